@@ -2,6 +2,7 @@ import pygame
 import threading
 import time
 import RPi.GPIO as GPIO
+from gpio_stepper import GPCLR0, gpio_regs
 
 # --- GPIO SETUP ---
 GPIO.setmode(GPIO.BCM)
@@ -12,6 +13,8 @@ for pin in left_motor_pins + right_motor_pins:
     GPIO.setup(pin, GPIO.OUT)
     GPIO.output(pin, False)
 
+ALL_PINS_MASK = sum(1 << pin for pin in left_motor_pins + right_motor_pins)
+
 step_sequence = [
     [1, 0, 0, 1],
     [1, 0, 0, 0],
@@ -24,11 +27,13 @@ step_sequence = [
 ]
 
 def move_motor(pins, step_count, delay=0.001, direction=1):
+    sequence = step_sequence[::direction]
+    gpio_out = GPIO.output  # look these up once, not once per phase
+    sleep = time.sleep
     for _ in range(step_count):
-        for step in range(8)[::direction]:
-            for pin in range(4):
-                GPIO.output(pins[pin], step_sequence[step][pin])
-            time.sleep(delay)
+        for step in sequence:
+            gpio_out(pins, step)  # drive all four coils in one call
+            sleep(delay)
 
 def threaded_move(pins, steps, direction):
     return threading.Thread(target=move_motor, args=(pins, steps, 0.001, direction))
@@ -60,8 +65,11 @@ def turn_right(steps):
     left.join()
 
 def stop():
-    for pin in left_motor_pins + right_motor_pins:
-        GPIO.output(pin, 0)
+    if gpio_regs is not None:
+        gpio_regs[GPCLR0] = ALL_PINS_MASK  # all eight coils off in one write
+    else:
+        for pin in left_motor_pins + right_motor_pins:
+            GPIO.output(pin, 0)
 
 # --- PYGAME SETUP ---
 pygame.init()
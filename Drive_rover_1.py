@@ -1,15 +1,14 @@
 import keyboard
 
-import threading
-
 import time 
 
-import RPi.GPIO as GPIO
+import pigpio
+from gpio_stepper import step_masks
 
 # Setup
-GPIO.setmode(GPIO.BCM)
-
-GPIO.setwarnings(False)
+pi = pigpio.pi()  # talks to the pigpio daemon (sudo pigpiod)
+if not pi.connected:
+    raise SystemExit("Could not connect to pigpiod - start it with 'sudo pigpiod'")
 
 
 # Motor 1 pins
@@ -17,105 +16,127 @@ left_motor_pins = [17, 18, 27, 22]
 # Motor 2 pins
 right_motor_pins = [5, 6, 13, 19]
 
+ALL_PINS_MASK = sum(1 << pin for pin in left_motor_pins + right_motor_pins)
+
 for pin in left_motor_pins + right_motor_pins:
-    GPIO.setup(pin, GPIO.OUT)
-    GPIO.output(pin, False)
-
-# Step sequence for 28BYJ-48
-step_sequence = [
-    [1, 0, 0, 1],
-    [1, 0, 0, 0],
-    [1, 1, 0, 0],
-    [0, 1, 0, 0],
-    [0, 1, 1, 0],
-    [0, 0, 1, 0],
-    [0, 0, 1, 1],
-    [0, 0, 0, 1]
-]
-
-def move_motor(pins, step_count, delay=0.001, direction=1):
-    for _ in range(step_count):
-        for step in range(8)[::direction]:
-            for pin in range(4):
-                GPIO.output(pins[pin], step_sequence[step][pin])
-            time.sleep(delay)
+    pi.set_mode(pin, pigpio.OUTPUT)
+pi.clear_bank_1(ALL_PINS_MASK)  # all eight coils off in one write
+pi.wave_clear()  # drop waves left behind by an earlier run
+
+left_motor_masks = step_masks(left_motor_pins)
+right_motor_masks = step_masks(right_motor_pins)
+
+# One-cycle waves already uploaded to pigpiod, keyed by (left_direction, right_direction)
+wave_ids = {}
+
+def build_wave(left_direction, right_direction, delay=0.001):
+    """Build (or reuse) a DMA-timed wave of one 8-phase cycle for both motors
+
+    A direction of 0 leaves that motor idle for the whole wave.
+    """
+    key = (left_direction, right_direction)
+    if key not in wave_ids:
+        delay_us = int(delay * 1000000)
+        idle = [(0, 0)] * 8
+        left = left_motor_masks[::left_direction] if left_direction else idle
+        right = right_motor_masks[::right_direction] if right_direction else idle
+        pi.wave_add_generic([pigpio.pulse(left_set | right_set, left_clear | right_clear, delay_us)
+                             for (left_set, left_clear), (right_set, right_clear) in zip(left, right)])
+        wave_ids[key] = pi.wave_create()
+    return wave_ids[key]
+
+def run_wave(steps, left_direction, right_direction):
+    """Have the DMA engine repeat the cycle `steps` times, then wait for it
+
+    The step count goes into the wave chain's loop counter, so Python only
+    hands over the cycle and a count; it runs nothing per step.
+    """
+    wave_id = build_wave(left_direction, right_direction)
+    pi.wave_chain([255, 0, wave_id, 255, 1, steps & 0xFF, steps >> 8])
+    while pi.wave_tx_busy():
+        time.sleep(0.01)
+
+def start_wave(left_direction, right_direction):
+    """Loop the cycle on the DMA engine until stop() or the next start_wave()"""
+    pi.wave_send_repeat(build_wave(left_direction, right_direction))
 
 #def forward(steps):
- #   move_motor(left_motor_pins, steps, direction=1)
-  #  move_motor(right_motor_pins, steps, direction=1)
+ #   move_motor(left_motor_masks, steps, direction=1)
+  #  move_motor(right_motor_masks, steps, direction=1)
 
 #def backward(steps):
- #   move_motor(left_motor_pins, steps, direction=-1)
-  #  move_motor(right_motor_pins, steps, direction=-1)
+ #   move_motor(left_motor_masks, steps, direction=-1)
+  #  move_motor(right_motor_masks, steps, direction=-1)
 
 def forward(steps):
-    left_thread = threading.Thread(target=move_motor, args=(left_motor_pins, steps, 0.001, 1))
-    right_thread = threading.Thread(target=move_motor, args=(right_motor_pins, steps, 0.001, 1))
-    left_thread.start()
-    right_thread.start()
-    left_thread.join()
-    right_thread.join()
+    run_wave(steps, 1, 1)
 
 def backward(steps):
-    left_thread = threading.Thread(target=move_motor, args=(left_motor_pins, steps, 0.001, -1))
-    right_thread = threading.Thread(target=move_motor, args=(right_motor_pins, steps, 0.001, -1))
-    left_thread.start()
-    right_thread.start()
-    left_thread.join()
-    right_thread.join()
-
+    run_wave(steps, -1, -1)
 
 def turn_left(steps):
-    move_motor(right_motor_pins, steps, direction=1)
+    run_wave(steps, 0, 1)
 
 def turn_right(steps):
-    move_motor(left_motor_pins, steps, direction=1)
+    run_wave(steps, 1, 0)
 
 def stop():
-    for pin in left_motor_pins + right_motor_pins:
-        GPIO.output(pin, 0)
-
-#try:
- #   print("turn left")
-  #  turn_left(512)
-   # time.sleep(1)
-#    print("turn right")
- #   turn_right(512)
-  #  
-   # print("forward")
-#    forward(512)
- #   print("backward")
-  #  backward(512)
-   # 
-   # print("did it work?")
-
-
-#finally:
- #   GPIO.cleanup()
+    pi.wave_tx_stop()  # abort a wave that is still playing
+    pi.clear_bank_1(ALL_PINS_MASK)
+
+def selftest():
+    """Short left/right/forward/backward run to check the wiring"""
+    try:
+        print("turn left")
+        turn_left(512)
+        time.sleep(1)
+        print("turn right")
+        turn_right(512)
+        
+        print("forward")
+        forward(512)
+        print("backward")
+        backward(512)
+        
+        print("did it work?")
+    finally:
+        stop()
+
+# (left_direction, right_direction) for each drive key
+KEY_MOVES = {'w': (1, 1), 's': (-1, -1), 'a': (0, 1), 'd': (1, 0)}
+held_keys = []  # drive keys currently down, most recent last
+
+def on_key_down(event):
+    if event.name in held_keys:
+        return  # auto-repeat while the key is held
+    held_keys.append(event.name)
+    start_wave(*KEY_MOVES[event.name])
+
+def on_key_up(event):
+    if event.name in held_keys:
+        held_keys.remove(event.name)
+    if held_keys:
+        start_wave(*KEY_MOVES[held_keys[-1]])  # fall back to a key still held
+    else:
+        stop()
 
 def drive():
     print("Control the rover with WASD keys. Press 'q' to quit.")
+    # The hooks all run on keyboard's listener thread, so they never race
+    for key in KEY_MOVES:
+        keyboard.on_press_key(key, on_key_down)
+        keyboard.on_release_key(key, on_key_up)
     try:
-        while True:
-            if keyboard.is_pressed('w'):
-                forward(512)
-            elif keyboard.is_pressed('s'):
-                backward(512)
-            elif keyboard.is_pressed('a'):
-                turn_left(512)
-            elif keyboard.is_pressed('d'):
-                turn_right(512)
-            elif keyboard.is_pressed('q'):
-                print("Quitting...")
-                break
-            else:
-                stop()  # Stop motors if no key is pressed
-            time.sleep(0.1)  # Add small delay to reduce CPU usage
+        keyboard.wait('q')
+        print("Quitting...")
 
     finally: 
-        GPIO.cleanup
+        keyboard.unhook_all()
+        stop()
+        pi.stop()
 
-drive () #actually needs to run the function to make the thing go!
+if __name__ == "__main__":
+    drive() #actually needs to run the function to make the thing go!
 
     
 
@@ -1,98 +1,111 @@
 import pygame
-import threading
 import time
-import RPi.GPIO as GPIO
+import pigpio
+from gpio_stepper import step_masks
 
 # --- GPIO SETUP ---
-GPIO.setmode(GPIO.BCM)
+pi = pigpio.pi()  # talks to the pigpio daemon (sudo pigpiod)
+if not pi.connected:
+    raise SystemExit("Could not connect to pigpiod - start it with 'sudo pigpiod'")
 left_motor_pins = [17, 18, 27, 22]
 right_motor_pins = [5, 6, 13, 19]
 
+ALL_PINS_MASK = sum(1 << pin for pin in left_motor_pins + right_motor_pins)
+
 for pin in left_motor_pins + right_motor_pins:
-    GPIO.setup(pin, GPIO.OUT)
-    GPIO.output(pin, False)
-
-step_sequence = [
-    [1, 0, 0, 1],
-    [1, 0, 0, 0],
-    [1, 1, 0, 0],
-    [0, 1, 0, 0],
-    [0, 1, 1, 0],
-    [0, 0, 1, 0],
-    [0, 0, 1, 1],
-    [0, 0, 0, 1]
-]
-
-def move_motor(pins, step_count, delay=0.001, direction=1):
-    for _ in range(step_count):
-        for step in range(8)[::direction]:
-            for pin in range(4):
-                GPIO.output(pins[pin], step_sequence[step][pin])
-            time.sleep(delay)
-
-def threaded_move(pins, steps, direction):
-    return threading.Thread(target=move_motor, args=(pins, steps, 0.001, direction))
+    pi.set_mode(pin, pigpio.OUTPUT)
+pi.clear_bank_1(ALL_PINS_MASK)  # all eight coils off in one write
+pi.wave_clear()  # drop waves left behind by an earlier run
+
+left_motor_masks = step_masks(left_motor_pins)
+right_motor_masks = step_masks(right_motor_pins)
+
+# One-cycle waves already uploaded to pigpiod, keyed by (left_direction, right_direction)
+wave_ids = {}
+
+def build_wave(left_direction, right_direction, delay=0.001):
+    """Build (or reuse) a DMA-timed wave of one 8-phase cycle for both motors
+
+    A direction of 0 leaves that motor idle for the whole wave.
+    """
+    key = (left_direction, right_direction)
+    if key not in wave_ids:
+        delay_us = int(delay * 1000000)
+        idle = [(0, 0)] * 8
+        left = left_motor_masks[::left_direction] if left_direction else idle
+        right = right_motor_masks[::right_direction] if right_direction else idle
+        pi.wave_add_generic([pigpio.pulse(left_set | right_set, left_clear | right_clear, delay_us)
+                             for (left_set, left_clear), (right_set, right_clear) in zip(left, right)])
+        wave_ids[key] = pi.wave_create()
+    return wave_ids[key]
+
+def run_wave(steps, left_direction, right_direction):
+    """Have the DMA engine repeat the cycle `steps` times, then wait for it
+
+    The step count goes into the wave chain's loop counter, so Python only
+    hands over the cycle and a count; it runs nothing per step.
+    """
+    wave_id = build_wave(left_direction, right_direction)
+    pi.wave_chain([255, 0, wave_id, 255, 1, steps & 0xFF, steps >> 8])
+    while pi.wave_tx_busy():
+        time.sleep(0.01)
+
+def start_wave(left_direction, right_direction):
+    """Loop the cycle on the DMA engine until stop() or the next start_wave()"""
+    pi.wave_send_repeat(build_wave(left_direction, right_direction))
 
 def forward(steps):
-    left = threaded_move(left_motor_pins, steps, -1)
-    right = threaded_move(right_motor_pins, steps, 1)
-    left.start()
-    right.start()
-    left.join()
-    right.join()
+    run_wave(steps, -1, 1)
 
 def backward(steps):
-    left = threaded_move(left_motor_pins, steps, 1)
-    right = threaded_move(right_motor_pins, steps, -1)
-    left.start()
-    right.start()
-    left.join()
-    right.join()
+    run_wave(steps, 1, -1)
 
 def turn_left(steps):
-    right = threaded_move(right_motor_pins, steps, 1)
-    right.start()
-    right.join()
+    run_wave(steps, 0, 1)
 
 def turn_right(steps):
-    left = threaded_move(left_motor_pins, steps, -1)
-    left.start()
-    left.join()
+    run_wave(steps, -1, 0)
 
 def stop():
-    for pin in left_motor_pins + right_motor_pins:
-        GPIO.output(pin, 0)
+    pi.wave_tx_stop()  # abort a wave that is still playing
+    pi.clear_bank_1(ALL_PINS_MASK)
 
 # --- PYGAME SETUP ---
 pygame.init()
-screen = pygame.display.set_mode((300, 300))
+# Nothing is drawn - the window only exists to receive key events, so it
+# is flipped once here rather than on every pass of the loop
+screen = pygame.display.set_mode((200, 40))
 pygame.display.set_caption("Rover Control")
+pygame.display.flip()
+
+# (left_direction, right_direction) for each drive key
+KEY_MOVES = {
+    pygame.K_w: (-1, 1),
+    pygame.K_s: (1, -1),
+    pygame.K_a: (0, 1),
+    pygame.K_d: (-1, 0),
+}
+held_keys = []  # drive keys currently down, most recent last
 
 running = True
-step_size = 128  # Smaller steps for smoother control
 
 try:
     print("Use W/A/S/D to drive. ESC to exit.")
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-        keys = pygame.key.get_pressed()
-
-        if keys[pygame.K_w]:
-            forward(step_size)
-        elif keys[pygame.K_s]:
-            backward(step_size)
-        elif keys[pygame.K_a]:
-            turn_left(step_size)
-        elif keys[pygame.K_d]:
-            turn_right(step_size)
-        else:
-            stop()
-
-        pygame.display.flip()
+        event = pygame.event.wait()  # sleep until something actually happens
+        if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            running = False
+        elif event.type == pygame.KEYDOWN and event.key in KEY_MOVES:
+            held_keys.append(event.key)
+            start_wave(*KEY_MOVES[event.key])
+        elif event.type == pygame.KEYUP and event.key in held_keys:
+            held_keys.remove(event.key)
+            if held_keys:
+                start_wave(*KEY_MOVES[held_keys[-1]])  # fall back to a key still held
+            else:
+                stop()
 
 finally:
-    GPIO.cleanup()
+    stop()
+    pi.stop()
     pygame.quit()
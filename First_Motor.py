@@ -1,10 +1,18 @@
 import time
-import RPi.GPIO as GPIO
+import pigpio
 
 motor_pins = [17, 18, 27, 22]
 
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(motor_pins, GPIO.OUT)
+pi = pigpio.pi()  # talks to the pigpio daemon (sudo pigpiod)
+if not pi.connected:
+    raise SystemExit("Could not connect to pigpiod - start it with 'sudo pigpiod'")
+
+ALL_PINS_MASK = sum(1 << pin for pin in motor_pins)
+
+for pin in motor_pins:
+    pi.set_mode(pin, pigpio.OUTPUT)
+pi.clear_bank_1(ALL_PINS_MASK)
+pi.wave_clear()  # drop waves left behind by an earlier run
 
 step_sequence = [
     [1, 0, 0, 1],
@@ -13,24 +21,39 @@ step_sequence = [
     [0, 0, 1, 1]
     ]
 
+# One-cycle waves already uploaded to pigpiod, keyed by (direction, delay)
+wave_ids = {}
+
+def build_wave(direction, delay=0.001):
+    """Build (or reuse) a DMA-timed wave of one cycle of step_sequence"""
+    key = (direction, delay)
+    if key not in wave_ids:
+        delay_us = int(delay * 1000000)
+        pulses = []
+        for step in step_sequence[::direction]:
+            set_mask = sum(1 << pin for pin, value in zip(motor_pins, step) if value)
+            clear_mask = sum(1 << pin for pin, value in zip(motor_pins, step) if not value)
+            pulses.append(pigpio.pulse(set_mask, clear_mask, delay_us))
+        pi.wave_add_generic(pulses)
+        wave_ids[key] = pi.wave_create()
+    return wave_ids[key]
+
 def step_motor(steps, delay=0.001):
-    if steps > 0:
-        sequence = step_sequence
-    else: 
-        sequence = step_sequence[::-1]
-        
-    for _ in range(abs(steps)):
-        for step in sequence:
-            for pin in range(4):
-                GPIO.output(motor_pins[pin], step[pin])
-                time.sleep(delay)
-                
+    """Let the DMA engine play `steps` cycles, then wait for it to finish"""
+    wave_id = build_wave(1 if steps > 0 else -1, delay)
+    count = abs(steps)
+    pi.wave_chain([255, 0, wave_id, 255, 1, count & 0xFF, count >> 8])
+    while pi.wave_tx_busy():
+        time.sleep(0.01)
+
 try:
     while True:
         step_motor(512)
         time.sleep(1)
         step_motor(-512)
         time.sleep(1)
-                        
+
 except KeyboardInterrupt:
-    GPIO.cleanup()
+    pi.wave_tx_stop()  # the wave keeps playing without Python otherwise
+    pi.clear_bank_1(ALL_PINS_MASK)
+    pi.stop()
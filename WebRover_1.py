@@ -1,5 +1,7 @@
-from flask import Flask, render_template_string, request
-import RPi.GPIO as GPIO
+from flask import Flask, Response, request
+import pigpio
+from gpio_stepper import step_masks
+import queue
 import threading
 import time
 
@@ -11,67 +13,122 @@ full_turn_steps = 128
 # ... (copy motor functions here: move_motor, threaded_move, forward, etc.)
 
 # --- GPIO SETUP ---
-GPIO.setmode(GPIO.BCM)
+pi = pigpio.pi()  # talks to the pigpio daemon (sudo pigpiod)
+if not pi.connected:
+    raise SystemExit("Could not connect to pigpiod - start it with 'sudo pigpiod'")
 left_motor_pins = [17, 18, 27, 22]
 right_motor_pins = [5, 6, 13, 19]
 
+ALL_PINS_MASK = sum(1 << pin for pin in left_motor_pins + right_motor_pins)
+
 for pin in left_motor_pins + right_motor_pins:
-    GPIO.setup(pin, GPIO.OUT)
-    GPIO.output(pin, False)
-
-step_sequence = [
-    [1, 0, 0, 1],
-    [1, 0, 0, 0],
-    [1, 1, 0, 0],
-    [0, 1, 0, 0],
-    [0, 1, 1, 0],
-    [0, 0, 1, 0],
-    [0, 0, 1, 1],
-    [0, 0, 0, 1]
-]
-
-def move_motor(pins, step_count, delay=0.001, direction=1):
-    for _ in range(step_count):
-        for step in range(8)[::direction]:
-            for pin in range(4):
-                GPIO.output(pins[pin], step_sequence[step][pin])
-            time.sleep(delay)
-
-def threaded_move(pins, steps, direction):
-    return threading.Thread(target=move_motor, args=(pins, steps, 0.001, direction))
-
-def forward(steps):
-    left = threaded_move(left_motor_pins, steps, -1)
-    right = threaded_move(right_motor_pins, steps, 1)
-    left.start()
-    right.start()
-    left.join()
-    right.join()
-
-def backward(steps):
-    left = threaded_move(left_motor_pins, steps, 1)
-    right = threaded_move(right_motor_pins, steps, -1)
-    left.start()
-    right.start()
-    left.join()
-    right.join()
-
-def turn_left(steps):
-    right = threaded_move(right_motor_pins, steps, 1)
-    right.start()
-    right.join()
-
-def turn_right(steps):
-    left = threaded_move(left_motor_pins, steps, -1)
-    left.start()
-    left.join()
+    pi.set_mode(pin, pigpio.OUTPUT)
+pi.clear_bank_1(ALL_PINS_MASK)  # all eight coils off in one write
+pi.wave_clear()  # drop waves left behind by an earlier run
+
+left_motor_masks = step_masks(left_motor_pins)
+right_motor_masks = step_masks(right_motor_pins)
+
+# One-cycle waves already uploaded to pigpiod, keyed by (left_direction, right_direction)
+wave_ids = {}
+
+def build_wave(left_direction, right_direction, delay=0.001):
+    """Build (or reuse) a DMA-timed wave of one 8-phase cycle for both motors
+
+    A direction of 0 leaves that motor idle for the whole wave.
+    """
+    key = (left_direction, right_direction)
+    if key not in wave_ids:
+        delay_us = int(delay * 1000000)
+        idle = [(0, 0)] * 8
+        left = left_motor_masks[::left_direction] if left_direction else idle
+        right = right_motor_masks[::right_direction] if right_direction else idle
+        pi.wave_add_generic([pigpio.pulse(left_set | right_set, left_clear | right_clear, delay_us)
+                             for (left_set, left_clear), (right_set, right_clear) in zip(left, right)])
+        wave_ids[key] = pi.wave_create()
+    return wave_ids[key]
+
+# Bumped by every stop(). A move queued before the latest stop must not
+# start its wave, and wave_lock keeps the check and the start together.
+stop_count = 0
+wave_lock = threading.Lock()
+
+def run_wave(steps, left_direction, right_direction, queued_at=None):
+    """Have the DMA engine repeat the cycle `steps` times, then wait for it
+
+    The step count goes into the wave chain's loop counter, so Python only
+    hands over the cycle and a count; it runs nothing per step. Nothing
+    plays if stop() was called since stop_count was `queued_at`.
+    """
+    wave_id = build_wave(left_direction, right_direction)
+    with wave_lock:
+        if queued_at is not None and queued_at != stop_count:
+            return
+        pi.wave_chain([255, 0, wave_id, 255, 1, steps & 0xFF, steps >> 8])
+    while pi.wave_tx_busy():
+        time.sleep(0.01)
+
+def forward(steps, queued_at=None):
+    run_wave(steps, -1, 1, queued_at)
+
+def backward(steps, queued_at=None):
+    run_wave(steps, 1, -1, queued_at)
+
+def turn_left(steps, queued_at=None):
+    run_wave(steps, 0, 1, queued_at)
+
+def turn_right(steps, queued_at=None):
+    run_wave(steps, -1, 0, queued_at)
 
 def stop():
-    for pin in left_motor_pins + right_motor_pins:
-        GPIO.output(pin, 0)
+    global stop_count
+    with wave_lock:
+        stop_count += 1  # moves queued until now won't start
+        pi.wave_tx_stop()  # abort a wave that is still playing
+        pi.clear_bank_1(ALL_PINS_MASK)
 
 # the above was copied from previous code
 
+# --- Command queue ---
+# Holds at most one pending (action, stop_count) pair; a newer request
+# replaces it
+command_queue = queue.Queue(maxsize=1)
+
+def run_action(action, queued_at):
+    if action == 'forward':
+        forward(full_turn_steps, queued_at)
+    elif action == 'backward':
+        backward(full_turn_steps, queued_at)
+    elif action == 'left':
+        turn_left(full_turn_steps, queued_at)
+    elif action == 'right':
+        turn_right(full_turn_steps, queued_at)
+
+def motor_worker():
+    """Run queued actions one at a time, off the Flask request threads"""
+    while True:
+        run_action(*command_queue.get())
+
+def queue_action(action):
+    if action == 'stop':
+        # Stop skips the queue: drop whatever is pending and halt right away
+        try:
+            command_queue.get_nowait()
+        except queue.Empty:
+            pass
+        stop()
+        return
+    queued_at = stop_count
+    while True:
+        try:
+            command_queue.put_nowait((action, queued_at))
+            return
+        except queue.Full:
+            try:
+                command_queue.get_nowait()
+            except queue.Empty:
+                pass
+
 app = Flask(__name__)
 
 HTML = """
@@ -86,25 +143,19 @@ HTML = """
     <button name="action" value="stop">Stop</button>
 </form>
 """
+# Every button press re-sends this page, so encode it just once
+HTML_BYTES = HTML.encode('utf-8')
 
 @app.route('/', methods=['GET', 'POST'])
 def control():
     if request.method == 'POST':
-        action = request.form['action']
-        if action == 'forward':
-            forward(full_turn_steps)
-        elif action == 'backward':
-            backward(full_turn_steps)
-        elif action == 'left':
-            turn_left(full_turn_steps)
-        elif action == 'right':
-            turn_right(full_turn_steps)
-        elif action == 'stop':
-            stop()
-    return render_template_string(HTML)
+        queue_action(request.form['action'])
+    return Response(HTML_BYTES, mimetype='text/html', headers={'Cache-Control': 'max-age=3600'})
 
 if __name__ == '__main__':
+    threading.Thread(target=motor_worker, daemon=True).start()
     try:
         app.run(host='0.0.0.0', port=5000, debug=False)
     finally:
-        GPIO.cleanup()
+        stop()
+        pi.stop()
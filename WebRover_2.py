@@ -1,121 +1,247 @@
-from flask import Flask, render_template_string
+from flask import Flask, Response, request
 from flask_socketio import SocketIO, emit
-import RPi.GPIO as GPIO
+import pigpio
+from gpio_stepper import step_masks, step_sequence
+import os
 import threading
 import time
-import json
+import struct
+import gzip
+
+# Optional: run the phase loop as native code that calls pigpiod_if2 directly
+try:
+    import ctypes
+    import numba
+    import numpy as np
+    pigpiod_if2 = ctypes.CDLL('libpigpiod_if2.so')
+except (ImportError, OSError):
+    print("WARNING: numba or libpigpiod_if2 not available. Stepping from Python.")
+    numba = None
 
 # --- Constants ---
 full_turn_steps = 128
 DEADZONE = 0.2
 MAX_SPEED_STEPS = 200
 
+# Core the motor worker runs on. Keep Linux off it by adding this to
+# /boot/firmware/cmdline.txt (Pi 4) and rebooting:
+#   isolcpus=nohz,domain,managed_irq,3 nohz_full=3 rcu_nocbs=3
+MOTOR_CPU = 3
+MOTOR_RT_PRIORITY = 80
+
 # --- GPIO SETUP ---
-GPIO.setmode(GPIO.BCM)
+pi = pigpio.pi()  # talks to the pigpio daemon (sudo pigpiod)
+if not pi.connected:
+    raise SystemExit("Could not connect to pigpiod - start it with 'sudo pigpiod'")
 left_motor_pins = [17, 18, 27, 22]
 right_motor_pins = [5, 6, 13, 19]
 
+ALL_PINS_MASK = sum(1 << pin for pin in left_motor_pins + right_motor_pins)
+
 for pin in left_motor_pins + right_motor_pins:
-    GPIO.setup(pin, GPIO.OUT)
-    GPIO.output(pin, False)
-
-step_sequence = [
-    [1, 0, 0, 1],
-    [1, 0, 0, 0],
-    [1, 1, 0, 0],
-    [0, 1, 0, 0],
-    [0, 1, 1, 0],
-    [0, 0, 1, 0],
-    [0, 0, 1, 1],
-    [0, 0, 0, 1]
-]
-
-# --- Global thread management ---
-current_threads = []
-thread_stop_flags = []
-
-def stop_all_threads():
-    """Stop all running motor threads"""
-    global current_threads, thread_stop_flags
-    
-    # Set all stop flags
-    for flag in thread_stop_flags:
-        flag['stop'] = True
-    
-    # Wait for all threads to finish
-    for thread in current_threads:
-        if thread.is_alive():
-            thread.join(timeout=1.0)
-    
-    # Clear the lists
-    current_threads.clear()
-    thread_stop_flags.clear()
+    pi.set_mode(pin, pigpio.OUTPUT)
+pi.clear_bank_1(ALL_PINS_MASK)  # all eight coils off in one write
+
+left_motor_masks = step_masks(left_motor_pins)
+right_motor_masks = step_masks(right_motor_pins)
+
+# Direction-resolved phase masks, built once at import so moves never slice
+# or rebuild them. Direction 0 leaves the motor alone for the whole cycle.
+idle_phases = [(0, 0)] * len(step_sequence)
+left_motor_phases = {1: left_motor_masks, -1: left_motor_masks[::-1], 0: idle_phases}
+right_motor_phases = {1: right_motor_masks, -1: right_motor_masks[::-1], 0: idle_phases}
 
 # --- Motor Control Functions ---
-def move_motor(pins, step_count, delay=0.001, direction=1, stop_flag=None):
-    """Move a single motor with stop flag support"""
-    for _ in range(abs(step_count)):
-        # Check stop flag
-        if stop_flag and stop_flag.get('stop', False):
-            break
-            
-        for step in range(8)[::direction]:
-            # Check stop flag again for faster response
-            if stop_flag and stop_flag.get('stop', False):
-                break
-                
-            for pin in range(4):
-                GPIO.output(pins[pin], step_sequence[step][pin])
-            time.sleep(delay)
+SPIN_NS = 200_000  # busy-wait only the last 0.2 ms before each phase deadline
+
+def spin_until(deadline_ns):
+    """Wait until time.perf_counter_ns() reaches deadline_ns
+
+    time.sleep alone overshoots by hundreds of microseconds, so sleep until
+    SPIN_NS before the deadline and busy-wait the rest. Spinning only for
+    that tail keeps the SocketIO threads from being starved of the GIL.
+    """
+    remaining = deadline_ns - time.perf_counter_ns()
+    if remaining > SPIN_NS:
+        time.sleep((remaining - SPIN_NS) / 1e9)
+    while time.perf_counter_ns() < deadline_ns:
+        pass
+
+if numba:
+    for name in ('set_bank_1', 'clear_bank_1'):
+        getattr(pigpiod_if2, name).argtypes = [ctypes.c_int, ctypes.c_uint32]
+        getattr(pigpiod_if2, name).restype = ctypes.c_int
+    pigpiod_if2.time_time.argtypes = []
+    pigpiod_if2.time_time.restype = ctypes.c_double
+    pigpiod_if2.time_sleep.argtypes = [ctypes.c_double]
+    pigpiod_if2.time_sleep.restype = None
+    pigpiod_if2.pigpio_start.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
+    pigpiod_if2.pigpio_start.restype = ctypes.c_int
+    pigpiod_if2.pigpio_stop.argtypes = [ctypes.c_int]
+    pigpiod_if2.pigpio_stop.restype = None
+
+    # The compiled loop uses its own pigpiod connection, separate from `pi`
+    jit_pi = pigpiod_if2.pigpio_start(None, None)
+    if jit_pi < 0:
+        # Its bank writes would fail silently and the rover wouldn't move
+        print("WARNING: libpigpiod_if2 couldn't connect to pigpiod. Stepping from Python.")
+        numba = None
+
+if numba:
+    set_bank_1 = pigpiod_if2.set_bank_1
+    clear_bank_1 = pigpiod_if2.clear_bank_1
+    time_time = pigpiod_if2.time_time
+    time_sleep = pigpiod_if2.time_sleep
+    SPIN_S = SPIN_NS / 1e9
+
+    @numba.njit(nogil=True)
+    def play_cycle_jit(handle, set_masks, clear_masks, delay, deadline):
+        for i in range(set_masks.shape[0]):
+            clear_bank_1(handle, clear_masks[i])
+            set_bank_1(handle, set_masks[i])
+            deadline = max(deadline + delay, time_time())
+            remaining = deadline - time_time()
+            if remaining > SPIN_S:
+                time_sleep(remaining - SPIN_S)
+            while time_time() < deadline:
+                pass
+        return deadline
+
+    def prepare_cycle(sequence, delay):
+        """Pack a cycle's masks into uint32 arrays for the compiled loop"""
+        set_masks = np.array([set_mask for set_mask, _ in sequence], dtype=np.uint32)
+        clear_masks = np.array([clear_mask for _, clear_mask in sequence], dtype=np.uint32)
+        return set_masks, clear_masks, delay
+
+    def play_cycle(cycle, deadline):
+        """Play one 8-phase cycle without the GIL; returns the next deadline"""
+        set_masks, clear_masks, delay = cycle
+        return play_cycle_jit(jit_pi, set_masks, clear_masks, delay, deadline)
+
+    # Compile now (an empty cycle writes nothing), not on the first move
+    # inside the real-time motor thread
+    play_cycle_jit(jit_pi, np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint32),
+                   0.0, time_time())
+
+    phase_clock = time_time
+else:
+    def prepare_cycle(sequence, delay):
+        return sequence, int(delay * 1e9)
+
+    def play_cycle(cycle, deadline):
+        """Play one 8-phase cycle; returns the next deadline"""
+        sequence, delay_ns = cycle
+        for set_mask, clear_mask in sequence:
+            pi.clear_bank_1(clear_mask)
+            pi.set_bank_1(set_mask)
+            # Pace against absolute deadlines so overshoot doesn't accumulate,
+            # but never try to catch up after a stall with a burst of fast steps
+            deadline = max(deadline + delay_ns, time.perf_counter_ns())
+            spin_until(deadline)
+        return deadline
+
+    phase_clock = time.perf_counter_ns
+
+STEP_DELAY = 0.001  # seconds per phase
+
+def combined_cycle(left_sign, right_sign):
+    """Merge both motors' phases for a rover-level (left, right) step sign
+
+    The left motor is mounted mirrored, so driving that side forward turns
+    its shaft backwards.
+    """
+    return [(left_set | right_set, left_clear | right_clear)
+            for (left_set, left_clear), (right_set, right_clear)
+            in zip(left_motor_phases[-left_sign], right_motor_phases[right_sign])]
+
+# Ready-to-play cycles for all 9 (sign(left), sign(right)) combinations
+DRIVE_CYCLES = {(left_sign, right_sign): prepare_cycle(combined_cycle(left_sign, right_sign), STEP_DELAY)
+                for left_sign in (-1, 0, 1) for right_sign in (-1, 0, 1)}
+
+def move_both(left_steps, right_steps):
+    """Step both motors from one loop; positive steps drive that side forward
+
+    Every phase switches all eight coils with a single pair of bank writes,
+    so the left and right step edges stay in lockstep. Once the shorter side
+    is done the longer side carries on alone.
+    """
+    left_sign = (left_steps > 0) - (left_steps < 0)
+    right_sign = (right_steps > 0) - (right_steps < 0)
+    left_count, right_count = abs(left_steps), abs(right_steps)
+    rest_key = (left_sign, 0) if left_count > right_count else (0, right_sign)
+    segments = [(DRIVE_CYCLES[left_sign, right_sign], min(left_count, right_count)),
+                (DRIVE_CYCLES[rest_key], abs(left_count - right_count))]
+    deadline = phase_clock()
     
-    # Turn off all pins when done
-    for pin in pins:
-        GPIO.output(pin, False)
+    for cycle, step_count in segments:
+        for _ in range(step_count):
+            if STOP.is_set():  # emergency stop: drop the rest of the move
+                return
+            deadline = play_cycle(cycle, deadline)
+
+# --- Motor worker ---
+MOVE_CHUNK_STEPS = 8  # steps per micro-move before looking for a newer command
+
+# Latest commanded move as remaining signed steps per side; `rev` is bumped
+# by every new command so the worker can tell its chunk was superseded
+target = {'left': 0, 'right': 0, 'rev': 0}
+target_changed = threading.Condition()
+STOP = threading.Event()  # set by stop_motors, checked by move_both every step
+
+def make_realtime():
+    """Pin the calling thread to MOTOR_CPU and switch it to SCHED_FIFO"""
+    try:
+        os.sched_setaffinity(0, {MOTOR_CPU})
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(MOTOR_RT_PRIORITY))
+    except (AttributeError, OSError) as e:  # PermissionError without sudo
+        print(f"WARNING: motor thread not realtime ({e}). Expect step jitter.")
 
-def threaded_move(pins, steps, direction, stop_flag):
-    """Create a thread for motor movement with stop flag"""
-    return threading.Thread(target=move_motor, args=(pins, abs(steps), 0.001, direction, stop_flag))
+def motor_loop():
+    """Single consumer that works off the latest command in short chunks
+
+    Rechecking `target` between chunks lets a newer joystick command take
+    over within MOVE_CHUNK_STEPS steps instead of queueing behind the old one.
+    """
+    make_realtime()
+    while True:
+        with target_changed:
+            if not (target['left'] or target['right']):
+                pi.clear_bank_1(ALL_PINS_MASK)  # idle: turn all coils off
+                while not (target['left'] or target['right']):
+                    target_changed.wait()
+            left_steps, right_steps, rev = target['left'], target['right'], target['rev']
+        
+        left_chunk = max(-MOVE_CHUNK_STEPS, min(MOVE_CHUNK_STEPS, left_steps))
+        right_chunk = max(-MOVE_CHUNK_STEPS, min(MOVE_CHUNK_STEPS, right_steps))
+        move_both(left_chunk, right_chunk)
+        
+        with target_changed:
+            if target['rev'] == rev:  # nothing newer arrived meanwhile
+                target['left'] -= left_chunk
+                target['right'] -= right_chunk
 
 def move_rover(left_steps, right_steps):
-    """Move the rover with both motors"""
-    global current_threads, thread_stop_flags
-    
-    # Stop any existing movement
-    stop_all_threads()
-    
-    threads = []
-    
-    if left_steps != 0:
-        left_direction = -1 if left_steps > 0 else 1
-        left_stop_flag = {'stop': False}
-        thread_stop_flags.append(left_stop_flag)
-        left_thread = threaded_move(left_motor_pins, abs(left_steps), left_direction, left_stop_flag)
-        threads.append(left_thread)
-        current_threads.append(left_thread)
-        left_thread.start()
-    
-    if right_steps != 0:
-        right_direction = 1 if right_steps > 0 else -1
-        right_stop_flag = {'stop': False}
-        thread_stop_flags.append(right_stop_flag)
-        right_thread = threaded_move(right_motor_pins, abs(right_steps), right_direction, right_stop_flag)
-        threads.append(right_thread)
-        current_threads.append(right_thread)
-        right_thread.start()
+    """Replace the current move; the motor worker picks it up within a chunk"""
+    with target_changed:
+        target['left'] = left_steps
+        target['right'] = right_steps
+        target['rev'] += 1
+        STOP.clear()
+        target_changed.notify()
 
 def stop_motors():
-    """Stop all motors immediately"""
-    stop_all_threads()
-    for pin in left_motor_pins + right_motor_pins:
-        GPIO.output(pin, 0)
+    """Stop all motors immediately, aborting the move in progress"""
+    with target_changed:
+        target['left'] = 0
+        target['right'] = 0
+        target['rev'] += 1
+        STOP.set()
+        target_changed.notify()
+    pi.clear_bank_1(ALL_PINS_MASK)
 
 def apply_deadzone(value, deadzone=DEADZONE):
-    if abs(value) < deadzone:
-        return 0
-    if value > 0:
-        return (value - deadzone) / (1 - deadzone)
-    else:
-        return (value + deadzone) / (1 - deadzone)
+    """Zero inside the deadzone, rescaled to 0..1 outside it (no branches)"""
+    return ((value > 0) - (value < 0)) * max(0.0, abs(value) - deadzone) / (1.0 - deadzone)
 
 # --- Flask App Setup ---
 app = Flask(__name__)
@@ -382,26 +508,19 @@ HTML_TEMPLATE = """
                         return gamepad.buttons[index] ? gamepad.buttons[index].pressed : false;
                     };
                     
-                    // Send controller data to server
-                    socket.emit('controller_data', {
-                        leftX: leftX,
-                        leftY: -leftY, // Invert Y axis
-                        rightX: rightX,
-                        rightY: -rightY, // Invert Y axis
-                        leftTrigger: leftTrigger,
-                        buttons: {
-                            A: getButton(0),
-                            B: getButton(1),
-                            X: getButton(2),
-                            Y: getButton(3)
-                        },
-                        dpad: {
-                            up: getButton(12),
-                            down: getButton(13),
-                            left: getButton(14),
-                            right: getButton(15)
-                        }
-                    });
+                    // Send controller data to server as one binary frame
+                    // laid out like CONTROLLER_FORMAT ('<5f2H', 24 bytes)
+                    const packet = new DataView(new ArrayBuffer(24));
+                    packet.setFloat32(0, leftX, true);
+                    packet.setFloat32(4, -leftY, true); // Invert Y axis
+                    packet.setFloat32(8, rightX, true);
+                    packet.setFloat32(12, -rightY, true); // Invert Y axis
+                    packet.setFloat32(16, leftTrigger, true);
+                    packet.setUint16(20, getButton(0) | getButton(1) << 1 |   // A, B
+                                         getButton(2) << 2 | getButton(3) << 3, true); // X, Y
+                    packet.setUint16(22, getButton(12) | getButton(13) << 1 | // up, down
+                                         getButton(14) << 2 | getButton(15) << 3, true); // left, right
+                    socket.emit('controller_data', packet.buffer);
                     
                     lastSendTime = currentTime;
                 }
@@ -438,6 +557,9 @@ HTML_TEMPLATE = """
 </body>
 </html>
 """
+# Static page, encoded (and gzipped, below) once at import
+HTML_BYTES = HTML_TEMPLATE.encode('utf-8')
+HTML_GZIP = gzip.compress(HTML_BYTES, 9)  # compressed once, not per request
 
 # --- WebSocket Event Handlers ---
 @socketio.on('connect')
@@ -450,43 +572,46 @@ def handle_disconnect():
     print('Client disconnected')
     stop_motors()
 
+# Binary controller frame sent by the page: leftX, leftY, rightX, rightY,
+# leftTrigger, then button bits (A=1 B=2 X=4 Y=8) and d-pad bits
+# (up=1 down=2 left=4 right=8)
+CONTROLLER_FORMAT = struct.Struct('<5f2H')
+BUTTON_A, BUTTON_B, BUTTON_X, BUTTON_Y = 1, 2, 4, 8
+DPAD_UP, DPAD_DOWN, DPAD_LEFT, DPAD_RIGHT = 1, 2, 4, 8
+
 @socketio.on('controller_data')
 def handle_controller_data(data):
     try:
+        left_x, left_y, right_x, right_y, left_trigger, buttons, dpad = CONTROLLER_FORMAT.unpack(data)
+        
         # Button actions
-        if data['buttons']['A']:  # Emergency stop
+        if buttons & BUTTON_A:  # Emergency stop
             stop_motors()
             return
         
-        if data['buttons']['B']:  # Forward
+        if buttons & BUTTON_B:  # Forward
             move_rover(full_turn_steps, full_turn_steps)
             return
             
-        if data['buttons']['X']:  # Backward
+        if buttons & BUTTON_X:  # Backward
             move_rover(-full_turn_steps, -full_turn_steps)
             return
         
         # D-pad actions
-        if data['dpad']['up']:
+        if dpad & DPAD_UP:
             move_rover(full_turn_steps//4, full_turn_steps//4)
             return
-        elif data['dpad']['down']:
+        elif dpad & DPAD_DOWN:
             move_rover(-full_turn_steps//4, -full_turn_steps//4)
             return
-        elif data['dpad']['left']:
+        elif dpad & DPAD_LEFT:
             move_rover(-full_turn_steps//4, full_turn_steps//4)
             return
-        elif data['dpad']['right']:
+        elif dpad & DPAD_RIGHT:
             move_rover(full_turn_steps//4, -full_turn_steps//4)
             return
         
         # Joystick control
-        left_x = data['leftX']
-        left_y = data['leftY']
-        right_x = data['rightX']
-        right_y = data['rightY']
-        left_trigger = data['leftTrigger']
-        
         # Determine drive mode
         if left_trigger > 0.5:  # Arcade drive
             forward = apply_deadzone(left_y)
@@ -495,10 +620,9 @@ def handle_controller_data(data):
             left_power = forward + turn
             right_power = forward - turn
             
-            max_power = max(abs(left_power), abs(right_power))
-            if max_power > 1.0:
-                left_power /= max_power
-                right_power /= max_power
+            max_power = max(abs(left_power), abs(right_power), 1.0)  # only scales down
+            left_power /= max_power
+            right_power /= max_power
             
             left_steps = int(left_power * MAX_SPEED_STEPS)
             right_steps = int(right_power * MAX_SPEED_STEPS)
@@ -533,9 +657,14 @@ def handle_manual_command(data):
 
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    headers = {'Cache-Control': 'public, max-age=86400', 'Vary': 'Accept-Encoding'}
+    if 'gzip' not in request.headers.get('Accept-Encoding', ''):
+        return Response(HTML_BYTES, mimetype='text/html', headers=headers)
+    headers['Content-Encoding'] = 'gzip'
+    return Response(HTML_GZIP, mimetype='text/html', headers=headers)
 
 if __name__ == '__main__':
+    threading.Thread(target=motor_loop, daemon=True).start()
     try:
         print("Starting Xbox Rover Control Server...")
         print("Connect to http://[PI_IP_ADDRESS]:5000 from your laptop")
@@ -545,4 +674,6 @@ if __name__ == '__main__':
         print("\nShutting down...")
     finally:
         stop_motors()
-        GPIO.cleanup()
+        if numba:
+            pigpiod_if2.pigpio_stop(jit_pi)
+        pi.stop()
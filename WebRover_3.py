@@ -1,19 +1,63 @@
-from flask import Flask, render_template_string, Response
+# Optional: run Socket.IO on eventlet so emits and the MJPEG streams are
+# cooperative. This has to happen before anything else imports socket/threading.
+try:
+    import eventlet
+    eventlet.monkey_patch()
+    import eventlet.tpool
+    import eventlet.wsgi
+except ImportError:
+    print("WARNING: eventlet not available. Serving with threads.")
+    eventlet = None
+
+from flask import Flask, Response
 from flask_socketio import SocketIO, emit
+from werkzeug.serving import WSGIRequestHandler
 import RPi.GPIO as GPIO
+from gpio_stepper import GPCLR0, gpio_regs, move_motor as play_steps, step_sequence
+import array
+import math
+import os
+import queue
+import socket
 import threading
 import time
-import json
 import cv2
-import base64
-import io
-from PIL import Image
+import numpy as np
+
+# With eventlet, threading/queue/time are green. The motor workers need real
+# OS threads (their step loops block and must keep exact timing), and the
+# blocking OpenCV calls go to eventlet's native thread pool.
+if eventlet:
+    native_threading = eventlet.patcher.original('threading')
+    native_queue = eventlet.patcher.original('queue')
+    native_sleep = eventlet.patcher.original('time').sleep
+    offload = eventlet.tpool.execute
+else:
+    native_threading, native_queue, native_sleep = threading, queue, time.sleep
+    def offload(func, *args):
+        return func(*args)
+
+# Optional: libjpeg-turbo (NEON on the Pi) is much faster than cv2.imencode
+try:
+    import simplejpeg
+except ImportError:
+    print("WARNING: simplejpeg not available. Encoding JPEGs with OpenCV.")
+    simplejpeg = None
 
 # --- Constants ---
 full_turn_steps = 128
 DEADZONE = 0.2
 MAX_SPEED_STEPS = 200
 
+# Camera stream settings, overridable from the environment
+JPEG_QUALITY = int(os.environ.get('ROVER_JPEG_QUALITY', 70))
+TARGET_FPS = float(os.environ.get('ROVER_TARGET_FPS', 15))
+FRAME_SIZE = (480, 360)
+LOW_QUALITY = 50           # used while a viewer is falling behind
+LOW_FRAME_SIZE = (320, 240)
+LAG_DEGRADE = 2.0  # average frames a viewer skips before dropping quality
+LAG_SKIP = 4.0     # ...and before encoding only every other frame
+
 # --- GPIO SETUP ---
 GPIO.setmode(GPIO.BCM)
 left_motor_pins = [17, 18, 27, 22]
@@ -23,26 +67,36 @@ for pin in left_motor_pins + right_motor_pins:
     GPIO.setup(pin, GPIO.OUT)
     GPIO.output(pin, False)
 
-step_sequence = [
-    [1, 0, 0, 1],
-    [1, 0, 0, 0],
-    [1, 1, 0, 0],
-    [0, 1, 0, 0],
-    [0, 1, 1, 0],
-    [0, 0, 1, 0],
-    [0, 0, 1, 1],
-    [0, 0, 0, 1]
-]
+ALL_PINS_MASK = sum(1 << pin for pin in left_motor_pins + right_motor_pins)
 
 # --- Global thread management ---
-current_threads = []
-thread_stop_flags = []
+# One long-lived worker per motor; each holds at most one pending move
+# (steps, direction, generation), and a newer move replaces it
+left_queue = native_queue.Queue(maxsize=1)
+right_queue = native_queue.Queue(maxsize=1)
+# Bumped by every stop; a move only runs while this still holds the
+# generation it was queued under. A one-word buffer rather than a plain int
+# so the compiled loop can read it without the GIL.
+move_generation = array.array('I', [0])
+# Held by Socket.IO handlers while they bump move_generation, and by
+# move_rover until its moves are queued, so a stop can't slip in between
+move_lock = threading.Lock()
 
 # --- Camera Setup ---
 camera = None
 camera_active = False
 camera_thread = None
-camera_stop_flag = {'stop': False}
+camera_stop_event = threading.Event()
+
+# Latest encoded frame, shared by every /video_feed client. `seq` goes up by
+# one per frame so each stream only sends frames it has not sent yet.
+latest_frame = {'jpeg': None, 'seq': 0}
+frame_ready = threading.Condition()
+# Per-viewer moving average of frames skipped between two sent frames;
+# a slow network shows up here as the stream falling behind the camera
+viewer_lag = {}
+viewer_lag_lock = threading.Lock()  # viewers come and go from request threads
+FRAME_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
 
 def initialize_camera():
     """Initialize the USB camera"""
@@ -53,9 +107,12 @@ def initialize_camera():
             test_camera = cv2.VideoCapture(i)
             if test_camera.isOpened():
                 # Set camera properties for better performance
-                test_camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                test_camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                test_camera.set(cv2.CAP_PROP_FPS, 15)  # Lower FPS for better network performance
+                # Capture at the stream size (in MJPG, which USB cameras can do at
+                # full rate) so frames normally need no resize at all
+                test_camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                test_camera.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_SIZE[0])
+                test_camera.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_SIZE[1])
+                test_camera.set(cv2.CAP_PROP_FPS, TARGET_FPS)  # Lower FPS for better network performance
                 test_camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer for lower latency
                 camera = test_camera
                 print(f"Camera initialized on index {i}")
@@ -68,43 +125,73 @@ def initialize_camera():
         print(f"Error initializing camera: {e}")
         return False
 
+def encode_jpeg(frame, quality=70):
+    """Encode a BGR frame as JPEG bytes"""
+    if simplejpeg:
+        return simplejpeg.encode_jpeg(frame, quality=quality, colorspace='BGR', fastdct=True)
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+def encode_frame(frame, size, quality, buffer):
+    """Resize (only if needed) and JPEG-encode one frame"""
+    # Resize frame for better network performance, into a
+    # preallocated buffer, and only if the camera ignored our size
+    if (frame.shape[1], frame.shape[0]) != size:
+        frame = cv2.resize(frame, size, dst=buffer, interpolation=cv2.INTER_LINEAR)
+    
+    # Convert frame to JPEG
+    return encode_jpeg(frame, quality)
+
 def camera_stream():
-    """Camera streaming function that runs in a separate thread"""
-    global camera, camera_active, camera_stop_flag
+    """Camera streaming function that runs in a separate (green) thread"""
+    global camera, camera_active
+    skip_frame = False
+    next_frame = time.monotonic()
+    frame = None  # reused by camera.read once it has the right shape
+    resized = {size: np.empty((size[1], size[0], 3), np.uint8) for size in (FRAME_SIZE, LOW_FRAME_SIZE)}
     
-    while not camera_stop_flag['stop']:
+    while not camera_stop_event.is_set():
         try:
             if camera and camera.isOpened():
-                ret, frame = camera.read()
+                ret, frame = offload(camera.read, frame)
                 if ret:
-                    # Resize frame for better network performance
-                    frame = cv2.resize(frame, (480, 360))
-                    
-                    # Convert frame to JPEG
-                    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                    
-                    # Convert to base64 for web transmission
-                    frame_base64 = base64.b64encode(buffer).decode('utf-8')
-                    
-                    # Emit frame to all connected clients
-                    socketio.emit('camera_frame', {'image': frame_base64})
+                    # Back off for the slowest viewer instead of spiralling into lag
+                    # (every other frame still goes out so the lag estimate keeps updating)
+                    with viewer_lag_lock:
+                        lags = list(viewer_lag.values())
+                    lag = max(lags, default=0.0)
+                    skip_frame = lag > LAG_SKIP and not skip_frame
+                    if not skip_frame:
+                        if lag > LAG_DEGRADE:
+                            size, quality = LOW_FRAME_SIZE, LOW_QUALITY
+                        else:
+                            size, quality = FRAME_SIZE, JPEG_QUALITY
+                        
+                        jpeg = offload(encode_frame, frame, size, quality, resized[size])
+                        
+                        # Hand the frame to every /video_feed stream
+                        with frame_ready:
+                            latest_frame['jpeg'] = jpeg
+                            latest_frame['seq'] += 1
+                            frame_ready.notify_all()
                     
-                    # Control frame rate
-                    time.sleep(1/15)  # ~15 FPS
+                    # Control frame rate against a deadline; stop_camera wakes this at once
+                    next_frame = max(next_frame + 1/TARGET_FPS, time.monotonic())
+                    camera_stop_event.wait(max(0.0, next_frame - time.monotonic()))
                 else:
-                    time.sleep(0.1)
+                    camera_stop_event.wait(0.1)
             else:
-                time.sleep(1)  # Wait if camera not available
+                camera_stop_event.wait(1)  # Wait if camera not available
         except Exception as e:
             print(f"Camera stream error: {e}")
-            time.sleep(1)
+            camera_stop_event.wait(1)
 
 def start_camera():
     """Start the camera stream"""
-    global camera_active, camera_thread, camera_stop_flag
+    global camera_active, camera_thread
     
-    if not camera_active and initialize_camera():
-        camera_stop_flag['stop'] = False
+    if not camera_active and offload(initialize_camera):
+        camera_stop_event.clear()
         camera_thread = threading.Thread(target=camera_stream)
         camera_thread.daemon = True
         camera_thread.start()
@@ -115,10 +202,12 @@ def start_camera():
 
 def stop_camera():
     """Stop the camera stream"""
-    global camera, camera_active, camera_thread, camera_stop_flag
+    global camera, camera_active, camera_thread
     
-    camera_stop_flag['stop'] = True
+    camera_stop_event.set()
     camera_active = False
+    with frame_ready:
+        frame_ready.notify_all()  # let the /video_feed streams finish
     
     if camera_thread and camera_thread.is_alive():
         camera_thread.join(timeout=2.0)
@@ -129,80 +218,89 @@ def stop_camera():
     
     print("Camera stream stopped")
 
+def mjpeg_frames():
+    """Yield multipart JPEG parts as new frames arrive, until the camera stops"""
+    viewer = object()
+    with viewer_lag_lock:
+        viewer_lag[viewer] = 0.0
+    seq = latest_frame['seq']
+    try:
+        while camera_active:
+            with frame_ready:
+                frame_ready.wait_for(lambda: latest_frame['seq'] != seq or not camera_active, timeout=1.0)
+                if latest_frame['seq'] == seq:
+                    continue
+                skipped = latest_frame['seq'] - seq - 1
+                jpeg, seq = latest_frame['jpeg'], latest_frame['seq']
+            with viewer_lag_lock:
+                viewer_lag[viewer] = 0.8 * viewer_lag[viewer] + 0.2 * skipped
+            yield FRAME_HEADER + jpeg + b'\r\n'
+    finally:
+        with viewer_lag_lock:
+            viewer_lag.pop(viewer, None)
+
+def drain(move_queue):
+    try:
+        move_queue.get_nowait()
+    except native_queue.Empty:
+        pass
+
+def next_generation():
+    """Bump move_generation (with move_lock held) and return the new value"""
+    move_generation[0] = (move_generation[0] + 1) & 0xFFFFFFFF
+    return move_generation[0]
+
 def stop_all_threads():
-    """Stop all running motor threads"""
-    global current_threads, thread_stop_flags
-    
-    # Set all stop flags
-    for flag in thread_stop_flags:
-        flag['stop'] = True
-    
-    # Wait for all threads to finish
-    for thread in current_threads:
-        if thread.is_alive():
-            thread.join(timeout=1.0)
-    
-    # Clear the lists
-    current_threads.clear()
-    thread_stop_flags.clear()
+    """Stop all running motor moves, and queued ones before they start"""
+    with move_lock:
+        next_generation()
 
-# --- Motor Control Functions ---
-def move_motor(pins, step_count, delay=0.001, direction=1, stop_flag=None):
-    """Move a single motor with stop flag support"""
-    for _ in range(abs(step_count)):
-        # Check stop flag
-        if stop_flag and stop_flag.get('stop', False):
-            break
-            
-        for step in range(8)[::direction]:
-            # Check stop flag again for faster response
-            if stop_flag and stop_flag.get('stop', False):
-                break
-                
-            for pin in range(4):
-                GPIO.output(pins[pin], step_sequence[step][pin])
-            time.sleep(delay)
-    
-    # Turn off all pins when done
-    for pin in pins:
-        GPIO.output(pin, False)
+def queue_move(move_queue, move):
+    while True:
+        try:
+            move_queue.put_nowait(move)
+            return
+        except native_queue.Full:
+            drain(move_queue)
 
-def threaded_move(pins, steps, direction, stop_flag):
-    """Create a thread for motor movement with stop flag"""
-    return threading.Thread(target=move_motor, args=(pins, abs(steps), 0.001, direction, stop_flag))
+def motor_worker(pins, move_queue):
+    """Run one motor's moves in turn, so a new move never overlaps the old one"""
+    while True:
+        steps, direction, generation = move_queue.get()
+        move_motor(pins, steps, 0.001, direction, generation)
+
+# --- Motor Control Functions ---
+def move_motor(pins, step_count, delay=0.001, direction=1, generation=None):
+    """Move a single motor until done or until move_generation moves on"""
+    if generation is None:
+        generation = move_generation[0]
+    # Shared stepping (compiled, through /dev/gpiomem when it can); the
+    # motor threads are native, so they sleep natively too
+    play_steps(pins, abs(step_count), delay, direction, move_generation, generation,
+               sleep=native_sleep, release=True)
 
 def move_rover(left_steps, right_steps):
     """Move the rover with both motors"""
-    global current_threads, thread_stop_flags
-    
-    # Stop any existing movement
-    stop_all_threads()
-    
-    threads = []
-    
-    if left_steps != 0:
-        left_direction = -1 if left_steps > 0 else 1
-        left_stop_flag = {'stop': False}
-        thread_stop_flags.append(left_stop_flag)
-        left_thread = threaded_move(left_motor_pins, abs(left_steps), left_direction, left_stop_flag)
-        threads.append(left_thread)
-        current_threads.append(left_thread)
-        left_thread.start()
-    
-    if right_steps != 0:
-        right_direction = 1 if right_steps > 0 else -1
-        right_stop_flag = {'stop': False}
-        thread_stop_flags.append(right_stop_flag)
-        right_thread = threaded_move(right_motor_pins, abs(right_steps), right_direction, right_stop_flag)
-        threads.append(right_thread)
-        current_threads.append(right_thread)
-        right_thread.start()
+    with move_lock:
+        # Stop any existing movement
+        generation = next_generation()
+        
+        if left_steps != 0:
+            left_direction = -1 if left_steps > 0 else 1
+            queue_move(left_queue, (abs(left_steps), left_direction, generation))
+        
+        if right_steps != 0:
+            right_direction = 1 if right_steps > 0 else -1
+            queue_move(right_queue, (abs(right_steps), right_direction, generation))
 
 def stop_motors():
     """Stop all motors immediately"""
     stop_all_threads()
-    for pin in left_motor_pins + right_motor_pins:
-        GPIO.output(pin, 0)
+    if gpio_regs is not None:
+        gpio_regs[GPCLR0] = ALL_PINS_MASK  # all eight coils off in one write
+    else:
+        for pin in left_motor_pins + right_motor_pins:
+            GPIO.output(pin, 0)
 
 def apply_deadzone(value, deadzone=DEADZONE):
     if abs(value) < deadzone:
@@ -212,9 +310,34 @@ def apply_deadzone(value, deadzone=DEADZONE):
     else:
         return (value + deadzone) / (1 - deadzone)
 
+# Joystick axes are quantized to LUT_SIZE levels so both drive mixers become
+# table lookups. The tables are filled once from the formulas above.
+LUT_SIZE = 256
+axis_levels = np.linspace(-1.0, 1.0, LUT_SIZE)
+deadzoned = np.array([apply_deadzone(v) for v in axis_levels])
+
+# Tank drive: per-stick steps
+TANK_LUT = (deadzoned * MAX_SPEED_STEPS).astype(np.int16)
+
+# Arcade drive: ARCADE_LUT[y, x] = (left_steps, right_steps)
+arcade_left = deadzoned[:, None] + deadzoned[None, :]   # forward + turn
+arcade_right = deadzoned[:, None] - deadzoned[None, :]  # forward - turn
+arcade_max = np.maximum(np.maximum(np.abs(arcade_left), np.abs(arcade_right)), 1.0)
+ARCADE_LUT = (np.stack([arcade_left, arcade_right], axis=-1) / arcade_max[..., None]
+              * MAX_SPEED_STEPS).astype(np.int16)
+
+def axis_index(value):
+    """Table index for a joystick axis value in -1..1"""
+    return min(LUT_SIZE - 1, max(0, int((value + 1.0) * (LUT_SIZE - 1) / 2)))
+
 # --- Flask App Setup ---
 app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet' if eventlet else 'threading')
+
+class NoDelayRequestHandler(WSGIRequestHandler):
+    """Sets TCP_NODELAY on every connection so Nagle never holds back a
+    small write like a socket reply or the tail of an MJPEG frame"""
+    disable_nagle_algorithm = True
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -509,7 +632,13 @@ HTML_TEMPLATE = """
         let gamepad = null;
         let animationId = null;
         let lastSendTime = 0;
-        const SEND_INTERVAL = 50; // Send data every 50ms (20 FPS)
+        const SEND_INTERVAL = 50; // Sample the controller every 50ms (20 FPS)
+        const BATCH_INTERVAL = 200; // ...but only send the samples every 200ms
+        const AXIS_EPSILON = 0.02; // smaller stick movements don't count as a change
+        const AXIS_DEADZONE = 0.2; // matches DEADZONE on the server
+        let batch = [];
+        let lastBatchTime = 0;
+        let lastSample = null;
         let cameraActive = false;
         let lastYButtonState = false;
         
@@ -605,28 +734,40 @@ HTML_TEMPLATE = """
                 }
                 lastYButtonState = yButtonPressed;
                 
-                // Only send data at controlled intervals
+                // Only sample data at controlled intervals
                 if (currentTime - lastSendTime >= SEND_INTERVAL) {
-                    // Send controller data to server
-                    socket.emit('controller_data', {
-                        leftX: leftX,
-                        leftY: -leftY, // Invert Y axis
-                        rightX: rightX,
-                        rightY: -rightY, // Invert Y axis
-                        leftTrigger: leftTrigger,
-                        buttons: {
-                            A: getButton(0),
-                            B: getButton(1),
-                            X: getButton(2),
-                            Y: getButton(3)
-                        },
-                        dpad: {
-                            up: getButton(12),
-                            down: getButton(13),
-                            left: getButton(14),
-                            right: getButton(15)
+                    // Controller state as one flat array:
+                    // [leftX, leftY, rightX, rightY, leftTrigger, buttons, dpad]
+                    const sample = [
+                        leftX,
+                        -leftY, // Invert Y axis
+                        rightX,
+                        -rightY, // Invert Y axis
+                        leftTrigger,
+                        getButton(0) | getButton(1) << 1 | getButton(2) << 2 | getButton(3) << 3,     // A B X Y
+                        getButton(12) | getButton(13) << 1 | getButton(14) << 2 | getButton(15) << 3  // up down left right
+                    ];
+                    const changed = !lastSample || sample.some((value, i) =>
+                        i >= 5 ? value !== lastSample[i] : Math.abs(value - lastSample[i]) > AXIS_EPSILON);
+                    const buttonEdge = lastSample && (sample[5] !== lastSample[5] || sample[6] !== lastSample[6]);
+                    const active = sample[5] || sample[6] || sample.slice(0, 4).some(value => Math.abs(value) > AXIS_DEADZONE);
+                    lastSample = sample;
+                    if (changed) {
+                        batch.push(sample);
+                    }
+                    
+                    // Send the batch every BATCH_INTERVAL, or right away on a button
+                    // press/release so stop is never delayed
+                    if (buttonEdge || currentTime - lastBatchTime >= BATCH_INTERVAL) {
+                        if (!batch.length && active) {
+                            batch.push(sample); // unchanged but held: keep the rover moving
+                        }
+                        if (batch.length) {
+                            socket.emit('controller_batch', batch);
+                            batch = [];
                         }
-                    });
+                        lastBatchTime = currentTime;
+                    }
                     
                     lastSendTime = currentTime;
                 }
@@ -657,19 +798,10 @@ HTML_TEMPLATE = """
             console.log('Rover status:', data);
         });
         
-        socket.on('camera_frame', (data) => {
-            const img = document.getElementById('cameraFeed');
-            const placeholder = document.getElementById('cameraPlaceholder');
-            
-            if (data.image) {
-                img.src = 'data:image/jpeg;base64,' + data.image;
-                img.style.display = 'block';
-                placeholder.style.display = 'none';
-                
-                if (!cameraActive) {
-                    cameraActive = true;
-                    document.getElementById('cameraStatus').textContent = 'Active';
-                }
+        // The feed is a plain MJPEG stream; the first frame marks it active
+        document.getElementById('cameraFeed').addEventListener('load', () => {
+            if (cameraActive) {
+                document.getElementById('cameraStatus').textContent = 'Active';
             }
         });
         
@@ -681,14 +813,19 @@ HTML_TEMPLATE = """
             if (data.status === 'started') {
                 cameraActive = true;
                 statusElement.textContent = 'Starting...';
+                img.src = '/video_feed?t=' + Date.now();  // fresh stream, never cached
+                img.style.display = 'block';
+                placeholder.style.display = 'none';
             } else if (data.status === 'stopped') {
                 cameraActive = false;
                 statusElement.textContent = 'Stopped';
+                img.removeAttribute('src');  // closes the stream
                 img.style.display = 'none';
                 placeholder.style.display = 'block';
             } else if (data.status === 'error') {
                 cameraActive = false;
                 statusElement.textContent = 'Error: ' + (data.message || 'Unknown error');
+                img.removeAttribute('src');
                 img.style.display = 'none';
                 placeholder.style.display = 'block';
                 placeholder.innerHTML = '❌ Camera Error<br><small>' + (data.message || 'Check camera connection') + '</small>';
@@ -709,6 +846,8 @@ HTML_TEMPLATE = """
 </body>
 </html>
 """
+# Nothing to fill in, so no render_template_string per request
+HTML_BYTES = HTML_TEMPLATE.encode('utf-8')
 
 # --- WebSocket Event Handlers ---
 @socketio.on('connect')
@@ -721,72 +860,95 @@ def handle_disconnect():
     print('Client disconnected')
     stop_motors()
 
+# Bits of the buttons and dpad fields in a controller_data packet
+BUTTON_A, BUTTON_B, BUTTON_X, BUTTON_Y = 1, 2, 4, 8
+DPAD_UP, DPAD_DOWN, DPAD_LEFT, DPAD_RIGHT = 1, 2, 4, 8
+DRIVE_BUTTONS = BUTTON_A | BUTTON_B | BUTTON_X  # Y toggles the camera in the page
+
+# Move for each pressed bit, where pressed = drive buttons | dpad << 3.
+# None means stop. Lower bits win, in the same order the old if/elif chain
+# checked them: A, B, X, up, down, left, right.
+PRESS_MOVES = {
+    BUTTON_A: None,                                                  # Emergency stop
+    BUTTON_B: (full_turn_steps, full_turn_steps),                    # Forward
+    BUTTON_X: (-full_turn_steps, -full_turn_steps),                  # Backward
+    DPAD_UP << 3: (full_turn_steps//4, full_turn_steps//4),
+    DPAD_DOWN << 3: (-full_turn_steps//4, -full_turn_steps//4),
+    DPAD_LEFT << 3: (-full_turn_steps//4, full_turn_steps//4),
+    DPAD_RIGHT << 3: (full_turn_steps//4, -full_turn_steps//4),
+}
+
+# The controller resends its state every 50 ms, mostly unchanged. Restarting
+# the motors for each packet only adds churn, so controller moves are gated:
+MIN_MOVE_INTERVAL = 0.03  # seconds between two motor restarts
+# The page re-sends a held stick only once per batch (BATCH_INTERVAL, 200ms),
+# so joystick moves are stretched to outlast the next two batches
+MIN_CONTROLLER_MOVE_TIME = 0.6
+last_move = {'cmd': None, 'at': 0.0, 'refresh': 0.0, 'stick': False}
+
+def controller_move(left_steps, right_steps, stick=False):
+    """move_rover for controller packets, skipping restarts that change nothing
+
+    stick marks joystick moves, which are stretched to at least
+    MIN_CONTROLLER_MOVE_TIME and stop as soon as the stick is let go.
+    Button and D-pad moves keep their step counts.
+    """
+    now = time.monotonic()
+    if now - last_move['at'] < MIN_MOVE_INTERVAL:
+        return
+    cmd = (left_steps, right_steps)
+    if cmd == last_move['cmd'] and now < last_move['refresh']:
+        return  # same move, still less than half done
+    move_time = max(abs(left_steps), abs(right_steps)) * len(step_sequence) * 0.001
+    if stick and 0 < move_time < MIN_CONTROLLER_MOVE_TIME:
+        # Phase timing is fixed, so this only makes the move last longer
+        stretch = math.ceil(MIN_CONTROLLER_MOVE_TIME / move_time)
+        left_steps, right_steps = left_steps * stretch, right_steps * stretch
+        move_time *= stretch
+    last_move.update(cmd=cmd, at=now, refresh=now + move_time / 2, stick=stick)
+    move_rover(left_steps, right_steps)
+
 @socketio.on('controller_data')
 def handle_controller_data(data):
     try:
-        # Button actions
-        if data['buttons']['A']:  # Emergency stop
-            stop_motors()
-            return
-        
-        if data['buttons']['B']:  # Forward
-            move_rover(full_turn_steps, full_turn_steps)
-            return
-            
-        if data['buttons']['X']:  # Backward
-            move_rover(-full_turn_steps, -full_turn_steps)
-            return
-        
-        # D-pad actions
-        if data['dpad']['up']:
-            move_rover(full_turn_steps//4, full_turn_steps//4)
-            return
-        elif data['dpad']['down']:
-            move_rover(-full_turn_steps//4, -full_turn_steps//4)
-            return
-        elif data['dpad']['left']:
-            move_rover(-full_turn_steps//4, full_turn_steps//4)
-            return
-        elif data['dpad']['right']:
-            move_rover(full_turn_steps//4, -full_turn_steps//4)
+        left_x, left_y, right_x, right_y, left_trigger, buttons, dpad = data
+        
+        # Button and D-pad actions
+        pressed = (buttons & DRIVE_BUTTONS) | dpad << 3
+        if pressed:
+            move = PRESS_MOVES[pressed & -pressed]  # lowest set bit
+            if move is None:
+                last_move['cmd'] = None  # the next move must go through
+                stop_motors()
+            else:
+                controller_move(*move)
             return
         
         # Joystick control
-        left_x = data['leftX']
-        left_y = data['leftY']
-        right_x = data['rightX']
-        right_y = data['rightY']
-        left_trigger = data['leftTrigger']
-        
         # Determine drive mode
         if left_trigger > 0.5:  # Arcade drive
-            forward = apply_deadzone(left_y)
-            turn = apply_deadzone(left_x)
-            
-            left_power = forward + turn
-            right_power = forward - turn
-            
-            max_power = max(abs(left_power), abs(right_power))
-            if max_power > 1.0:
-                left_power /= max_power
-                right_power /= max_power
-            
-            left_steps = int(left_power * MAX_SPEED_STEPS)
-            right_steps = int(right_power * MAX_SPEED_STEPS)
+            left_steps, right_steps = ARCADE_LUT[axis_index(left_y), axis_index(left_x)].tolist()
         else:  # Tank drive
-            left_y = apply_deadzone(left_y)
-            right_y = apply_deadzone(right_y)
-            
-            left_steps = int(left_y * MAX_SPEED_STEPS)
-            right_steps = int(right_y * MAX_SPEED_STEPS)
+            left_steps = int(TANK_LUT[axis_index(left_y)])
+            right_steps = int(TANK_LUT[axis_index(right_y)])
         
         # Move rover if there's significant input
         if abs(left_steps) > 5 or abs(right_steps) > 5:
-            move_rover(left_steps, right_steps)
+            controller_move(left_steps, right_steps, stick=True)
+        elif last_move['stick'] and last_move['cmd'] is not None:
+            # Stick let go: don't coast out the rest of a (stretched) move
+            last_move['cmd'] = None
+            stop_motors()
             
     except Exception as e:
         print(f"Error processing controller data: {e}")
 
+@socketio.on('controller_batch')
+def handle_controller_batch(batch):
+    """A batch of controller samples; only the newest one still matters"""
+    if batch:
+        handle_controller_data(batch[-1])
+
 @socketio.on('manual_command')
 def handle_manual_command(data):
     command = data['command']
@@ -817,15 +979,29 @@ def handle_camera_command(data):
 
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    return Response(HTML_BYTES, mimetype='text/html', headers={'Cache-Control': 'public, max-age=3600'})
+
+@app.route('/video_feed')
+def video_feed():
+    return Response(mjpeg_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 if __name__ == '__main__':
+    native_threading.Thread(target=motor_worker, args=(left_motor_pins, left_queue), daemon=True).start()
+    native_threading.Thread(target=motor_worker, args=(right_motor_pins, right_queue), daemon=True).start()
     try:
         print("Starting Xbox Rover Control Server with Camera...")
         print("Connect to http://[PI_IP_ADDRESS]:5000 from your laptop")
         print("Make sure your Xbox controller is connected to the laptop!")
         print("USB Camera will be auto-detected when you start streaming")
-        socketio.run(app, host='0.0.0.0', port=5000, debug=False)
+        if eventlet:
+            # Open the listener ourselves (socketio.run would) so it can get
+            # TCP_NODELAY; Linux copies it to every accepted connection
+            listener = eventlet.listen(('0.0.0.0', 5000))
+            listener.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            eventlet.wsgi.server(listener, app)
+        else:
+            socketio.run(app, host='0.0.0.0', port=5000, debug=False,
+                         request_handler=NoDelayRequestHandler)
     except KeyboardInterrupt:
         print("\nShutting down...")
     finally:
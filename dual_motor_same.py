@@ -2,6 +2,7 @@
 import time 
 
 import RPi.GPIO as GPIO
+from gpio_stepper import GPCLR0, gpio_regs, move_motor  # shared /dev/gpiomem + compiled stepping
 
 # Setup
 GPIO.setmode(GPIO.BCM)
@@ -15,24 +16,7 @@ for pin in left_motor_pins + right_motor_pins:
     GPIO.setup(pin, GPIO.OUT)
     GPIO.output(pin, False)
 
-# Step sequence for 28BYJ-48
-step_sequence = [
-    [1, 0, 0, 1],
-    [1, 0, 0, 0],
-    [1, 1, 0, 0],
-    [0, 1, 0, 0],
-    [0, 1, 1, 0],
-    [0, 0, 1, 0],
-    [0, 0, 1, 1],
-    [0, 0, 0, 1]
-]
-
-def move_motor(pins, step_count, delay=0.001, direction=1):
-    for _ in range(step_count):
-        for step in range(8)[::direction]:
-            for pin in range(4):
-                GPIO.output(pins[pin], step_sequence[step][pin])
-            time.sleep(delay)
+ALL_PINS_MASK = sum(1 << pin for pin in left_motor_pins + right_motor_pins)
 
 def forward(steps):
     move_motor(left_motor_pins, steps, direction=1)
@@ -49,16 +33,24 @@ def turn_right(steps):
     move_motor(left_motor_pins, steps, direction=1)
 
 def stop():
-    for pin in left_motor_pins + right_motor_pins:
-        GPIO.output(pin, 0)
-
-try:
-    print("turn left")
-    turn_left(512)
-    time.sleep(1)
-    print("turn right")
-    turn_right(512)
-    print("did it work?")
-
-finally:
-    GPIO.cleanup()
+    if gpio_regs is not None:
+        gpio_regs[GPCLR0] = ALL_PINS_MASK  # all eight coils off in one write
+    else:
+        for pin in left_motor_pins + right_motor_pins:
+            GPIO.output(pin, 0)
+
+def selftest():
+    """Turn each way once to check both motors"""
+    try:
+        print("turn left")
+        turn_left(512)
+        time.sleep(1)
+        print("turn right")
+        turn_right(512)
+        print("did it work?")
+
+    finally:
+        GPIO.cleanup()
+
+if __name__ == "__main__":
+    selftest()
@@ -1,5 +1,6 @@
 import time
 import RPi.GPIO as GPIO
+from gpio_stepper import move_motor  # shared /dev/gpiomem + compiled stepping
 
 # Setup
 GPIO.setmode(GPIO.BCM)
@@ -13,25 +14,6 @@ for pin in motor1_pins + motor2_pins:
     GPIO.setup(pin, GPIO.OUT)
     GPIO.output(pin, False)
 
-# Step sequence for 28BYJ-48
-step_sequence = [
-    [1, 0, 0, 1],
-    [1, 0, 0, 0],
-    [1, 1, 0, 0],
-    [0, 1, 0, 0],
-    [0, 1, 1, 0],
-    [0, 0, 1, 0],
-    [0, 0, 1, 1],
-    [0, 0, 0, 1]
-]
-
-def move_motor(pins, steps, delay=0.001, direction=1):
-    for _ in range(steps):
-        for step in range(8)[::direction]:
-            for pin in range(4):
-                GPIO.output(pins[pin], step_sequence[step][pin])
-            time.sleep(delay)
-
 try:
     print("Spinning motors forward...")
     move_motor(motor1_pins, 512)  # 512 steps = ~1 rev
@@ -0,0 +1,121 @@
+"""Shared 28BYJ-48 stepping for the RPi.GPIO scripts
+
+dual_motor_test.py, dual_motor_same.py and WebRover_3.py all step through
+move_motor() here, and rover_server.py borrows gpio_regs/stepper_core when
+pigpio isn't running. The pigpio scripts only take step_sequence and
+step_masks() for their bank writes and waves.
+
+RPi.GPIO still does setup and cleanup in the scripts, but steps are written
+straight to the GPSET0/GPCLR0 registers through /dev/gpiomem (BCM283x/BCM2711,
+i.e. Pi 1-4; no root needed). Each phase is then two 32-bit stores instead of
+a GPIO.output call per coil, and with stepper_core the whole move runs in C.
+"""
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None  # fine for the pigpio scripts, which never call move_motor()
+import array
+import mmap
+import os
+import time
+
+# Half-step sequence, one row per phase: coil states for the motor's 4 pins
+step_sequence = [
+    [1, 0, 0, 1],
+    [1, 0, 0, 0],
+    [1, 1, 0, 0],
+    [0, 1, 0, 0],
+    [0, 1, 1, 0],
+    [0, 0, 1, 0],
+    [0, 0, 1, 1],
+    [0, 0, 0, 1]
+]
+
+GPSET0 = 0x1c // 4  # word offsets into the GPIO register block
+GPCLR0 = 0x28 // 4
+try:
+    gpiomem_fd = os.open('/dev/gpiomem', os.O_RDWR | os.O_SYNC)
+    gpio_map = mmap.mmap(gpiomem_fd, 4096, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+    os.close(gpiomem_fd)
+    gpio_regs = memoryview(gpio_map).cast('I')
+except OSError:
+    print("WARNING: /dev/gpiomem not available. Stepping through RPi.GPIO.")
+    gpio_regs = None
+
+# Optional: compiled step loop (stepper_core.pyx), built by pyximport on first use
+try:
+    import pyximport
+    pyximport.install(language_level=3)
+    import stepper_core
+except ImportError:
+    print("WARNING: Cython or stepper_core not available. Stepping from Python.")
+    stepper_core = None
+
+def step_masks(pins):
+    """Precompute a (set_mask, clear_mask) pair for every row of step_sequence
+
+    The masks work for GPSET0/GPCLR0 and for pigpio's bank 1 alike.
+    """
+    masks = []
+    for step in step_sequence:
+        set_mask = sum(1 << pin for pin, value in zip(pins, step) if value)
+        clear_mask = sum(1 << pin for pin, value in zip(pins, step) if not value)
+        masks.append((set_mask, clear_mask))
+    return masks
+
+# Per (pins, direction): the (set, clear) pairs in playing order, and the
+# same flattened to array('I') set, clear, set, ... for stepper_core.
+# Filled the first time a motor moves.
+motor_masks = {}
+motor_flat_masks = {}
+# Never changes, for moves that can't be cancelled
+NOT_CANCELLED = array.array('I', [0])
+
+def prepare_motor(pins):
+    """Build the mask tables for a motor (move_motor does this on first use)"""
+    masks = step_masks(pins)
+    for direction in (1, -1):
+        motor_masks[tuple(pins), direction] = masks[::direction]
+        motor_flat_masks[tuple(pins), direction] = array.array(
+            'I', [mask for pair in masks[::direction] for mask in pair])
+
+def move_motor(pins, step_count, delay=0.001, direction=1,
+               generation=NOT_CANCELLED, expected=0, sleep=time.sleep, release=False):
+    """
+    Play step_count cycles of step_sequence on one motor, delay seconds per phase
+
+    The move ends early, before the next phase, once generation[0] (a
+    one-word array('I') another thread may bump) no longer equals expected.
+    sleep is used between phases of the Python loop; release=True turns
+    the coils off afterwards.
+    """
+    key = (tuple(pins), direction)
+    if key not in motor_masks:
+        prepare_motor(pins)
+    if stepper_core and gpio_regs is not None:
+        # Whole move in compiled code, without the GIL
+        stepper_core.run(gpio_regs, motor_flat_masks[key], step_count, delay, generation, expected)
+    else:
+        sequence = step_sequence[::direction]
+        masks = motor_masks[key]
+        for _ in range(step_count):
+            # Check for a stop
+            if generation[0] != expected:
+                break
+            for step, (set_mask, clear_mask) in zip(sequence, masks):
+                # Check again for faster response
+                if generation[0] != expected:
+                    break
+                if gpio_regs is not None:
+                    gpio_regs[GPCLR0] = clear_mask  # only this motor's bits change
+                    gpio_regs[GPSET0] = set_mask
+                else:
+                    GPIO.output(pins, step)  # drive all four coils in one call
+                sleep(delay)
+
+    if release:
+        if gpio_regs is not None:
+            gpio_regs[GPCLR0] = sum(1 << pin for pin in pins)
+        else:
+            GPIO.output(pins, False)
@@ -9,17 +9,28 @@ NEW FEATURES:
 - Variable speed control based on joystick position
 """
 
+import array
 import asyncio
 import json
 import logging
-from typing import Dict, List, Optional
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import threading
+import time
 
 # Web framework and WebSocket support
 from aiohttp import web
 import aiohttp_cors
 
+# Optional: uvloop is a drop-in event loop written on libuv, cheaper per message
+try:
+    import uvloop
+except ImportError:
+    print("WARNING: uvloop not available. Using the standard asyncio loop.")
+    uvloop = None
+
 # Raspberry Pi GPIO control
 try:
     import RPi.GPIO as GPIO
@@ -27,6 +38,93 @@ except ImportError:
     print("WARNING: RPi.GPIO not available. Running in simulation mode.")
     GPIO = None
 
+# Optional: pigpio writes a whole step pattern in one bank write
+# (needs the daemon: sudo pigpiod)
+try:
+    import pigpio
+    pi = pigpio.pi()
+    if not pi.connected:
+        print("WARNING: pigpiod not running. Stepping through RPi.GPIO.")
+        pi = None
+except ImportError:
+    print("WARNING: pigpio not available. Stepping through RPi.GPIO.")
+    pi = None
+
+# Without pigpio, steps can still skip RPi.GPIO: the compiled stepper_core
+# writes the GPIO registers through /dev/gpiomem (see gpio_stepper.py)
+gpio_regs = None
+stepper_core = None
+if GPIO and not pi:
+    from gpio_stepper import gpio_regs, stepper_core
+
+# With pigpio, pulses come from its DMA engine as a repeating wave and no
+# Python runs per step. ROVER_WAVES=0 uses the stepping threads instead.
+WAVE_DRIVE = bool(pi) and os.environ.get('ROVER_WAVES', '1') != '0'
+if WAVE_DRIVE:
+    pi.wave_clear()  # drop waves left behind by an earlier run
+
+# Optional: numba compiles the stepping loop, which then calls the pigpiod_if2
+# C library directly instead of going through the interpreter for every step
+try:
+    import ctypes
+    import ctypes.util
+    import llvmlite.binding
+    import numba
+    import numpy as np
+except ImportError:
+    print("WARNING: numba not available. Stepping loop runs in Python.")
+    numba = None
+
+run_steps = None
+if numba and pi:
+    pigpiod_path = ctypes.util.find_library("pigpiod_if2")
+    if pigpiod_path:
+        llvmlite.binding.load_library_permanently(pigpiod_path)
+        pigpiod_if2 = ctypes.CDLL(pigpiod_path)
+        pigpiod_if2.pigpio_start.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
+        PI_HANDLE = pigpiod_if2.pigpio_start(None, None)  # own connection to pigpiod
+    if not pigpiod_path or PI_HANDLE < 0:
+        print("WARNING: libpigpiod_if2 not usable. Stepping loop runs in Python.")
+    else:
+        # Bound by symbol name rather than by ctypes address, so cache=True
+        # can keep the compiled loop on disk between runs
+        c_set_bank_1 = numba.types.ExternalFunction(
+            "set_bank_1", numba.types.int32(numba.types.int32, numba.types.uint32))
+        c_clear_bank_1 = numba.types.ExternalFunction(
+            "clear_bank_1", numba.types.int32(numba.types.int32, numba.types.uint32))
+        c_time_time = numba.types.ExternalFunction("time_time", numba.types.float64())
+        c_time_sleep = numba.types.ExternalFunction(
+            "time_sleep", numba.types.void(numba.types.float64))
+
+        @numba.njit(cache=True, nogil=True)
+        def run_steps(handle, masks, step, state, base_delay):
+            """
+            Compiled version of StepperMotor's stepping loop
+            
+            masks is the StepperMotor's ring of (set_mask, clear_mask) rows
+            (a power-of-two length), state is
+            [target_speed, is_running], written by the asyncio thread.
+            Returns the step the motor stopped on.
+            """
+            next_step = c_time_time()
+            while state[1]:
+                speed = state[0]
+                if abs(speed) <= 0.1:
+                    break
+                step = (step + (1 if speed > 0 else -1)) & (masks.shape[0] - 1)
+                c_clear_bank_1(handle, masks[step, 1])
+                c_set_bank_1(handle, masks[step, 0])
+                next_step = max(next_step + base_delay / abs(speed), c_time_time())
+                c_time_sleep(next_step - c_time_time())
+            return step
+
+# Optional: orjson serializes straight to bytes, a few times faster than json
+try:
+    import orjson
+except ImportError:
+    print("WARNING: orjson not available. Using json for broadcasts.")
+    orjson = None
+
 # USB Camera support
 try:
     import cv2
@@ -34,10 +132,53 @@ except ImportError:
     print("WARNING: opencv-python not available. Camera disabled.")
     cv2 = None
 
+# Optional: PyTurboJPEG encodes with libjpeg-turbo's NEON code on the Pi,
+# for cameras that can't send MJPG themselves
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_422
+    turbo_jpeg = TurboJPEG()
+except (ImportError, OSError):
+    print("WARNING: PyTurboJPEG not available. Encoding with cv2.imencode.")
+    turbo_jpeg = None
+
 # Configure logging for debugging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Joystick updates arrive as binary frames instead of JSON:
+# 1-byte message tag, then left and right speed as little-endian float32
+TANK_DRIVE = 1
+TANK_DRIVE_FRAME = struct.Struct('<Bff')
+
+# Wrapped around each JPEG in the multipart camera stream
+MJPEG_PREFIX = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+MJPEG_SUFFIX = b'\r\n'
+
+
+def json_bytes(data: Dict) -> bytes:
+    """Serialize data to UTF-8 encoded JSON"""
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+
+SPIN_TIME = 0.0002  # busy-wait only the last 0.2 ms before a step deadline
+
+
+def sleep_until(deadline: float):
+    """
+    Wait until time.perf_counter() reaches deadline
+    
+    time.sleep alone overshoots by up to a few hundred microseconds, a big
+    part of a step at full speed, so sleep until SPIN_TIME before the
+    deadline and busy-wait the rest.
+    """
+    remaining = deadline - time.perf_counter()
+    if remaining > SPIN_TIME:
+        time.sleep(remaining - SPIN_TIME)
+    while time.perf_counter() < deadline:
+        pass
+
 
 class StepperMotor:
     """
@@ -57,18 +198,56 @@ class StepperMotor:
         [1, 0, 0, 1]
     ]
     
+    # The step patterns are repeated into a power-of-two ring, so moving
+    # along it is an add and a bit-mask instead of a modulo
+    RING_SIZE = 128
+    RING_MASK = RING_SIZE - 1
+    
     def __init__(self, pins: List[int], name: str = "Motor"):
         self.pins = pins
         self.name = name
-        self.current_step = 0
+        # Bank-1 masks for pigpio: all of this motor's pins, and a
+        # (set_mask, clear_mask) pair for each row of STEP_SEQUENCE
+        self._pin_mask = sum(1 << pin for pin in pins)
+        self._masks = tuple(
+            (sum(1 << pin for pin, value in zip(pins, row) if value),
+             sum(1 << pin for pin, value in zip(pins, row) if not value))
+            for row in self.STEP_SEQUENCE)
+        repeats = self.RING_SIZE // len(self.STEP_SEQUENCE)
+        self._ring = self._masks * repeats
+        self._ring_rows = self.STEP_SEQUENCE * repeats
+        if run_steps:
+            self._mask_array = np.array(self._ring, dtype=np.uint32)
+            self._state = np.zeros(2)  # target_speed, is_running for run_steps
+        # For stepper_core: one whole cycle per direction as flat set, clear
+        # pairs, ending back on step 0 so bursts join up seamlessly. stop()
+        # bumps _stops, which ends a burst at its next phase.
+        self._burst_masks = None
+        self._stops = array.array('I', [0])
+        if stepper_core and gpio_regs is not None:
+            self._burst_masks = {
+                direction: array.array('I', [mask for i in range(1, len(self.STEP_SEQUENCE) + 1)
+                                             for mask in self._ring[(i * direction) & self.RING_MASK]])
+                for direction in (1, -1)}
+        self.current_step = 0  # index into the ring
         self.is_running = False
-        self.current_speed = 0.0  # -1.0 to 1.0
-        self.motor_task = None
+        self.target_speed = 0.0  # -1.0 to 1.0, read by the worker every step
+        self.speed_changed = threading.Event()
         self.setup_gpio()
+        
+        # Steps come from a dedicated thread, not the event loop, so websocket
+        # traffic can't disturb the step timing (unless pigpio waves do it)
+        self.worker = threading.Thread(target=self._worker, name=name, daemon=True)
+        if not WAVE_DRIVE:
+            self.worker.start()
     
     def setup_gpio(self):
         """Configure GPIO pins for output"""
-        if GPIO:
+        if pi:
+            for pin in self.pins:
+                pi.set_mode(pin, pigpio.OUTPUT)
+            pi.clear_bank_1(self._pin_mask)
+        elif GPIO:
             GPIO.setmode(GPIO.BCM)
             for pin in self.pins:
                 GPIO.setup(pin, GPIO.OUT)
@@ -76,14 +255,22 @@ class StepperMotor:
     
     def step(self, direction: int = 1):
         """Move motor one step"""
-        self.current_step = (self.current_step + direction) % len(self.STEP_SEQUENCE)
-        step_pattern = self.STEP_SEQUENCE[self.current_step]
+        self.current_step = (self.current_step + direction) & self.RING_MASK
         
-        if GPIO:
-            for pin, value in zip(self.pins, step_pattern):
-                GPIO.output(pin, value)
-    
-    async def run_at_speed(self, speed: float):
+        if pi:
+            set_mask, clear_mask = self._ring[self.current_step]
+            pi.clear_bank_1(clear_mask)
+            pi.set_bank_1(set_mask)
+        elif GPIO:
+            GPIO.output(self.pins, self._ring_rows[self.current_step])  # all four pins in one call
+    
+    # Seconds per step at full speed (10 ms at the 0.1 deadzone edge). The
+    # 28BYJ-48 can't go much faster, and keeping every delay well above
+    # SPIN_TIME means sleep_until() mostly sleeps rather than spinning with
+    # the GIL held, which would starve the event loop and the other motor.
+    BASE_DELAY = 0.001
+    
+    def set_speed(self, speed: float):
         """
         Run motor continuously at specified speed
         
@@ -92,33 +279,91 @@ class StepperMotor:
         
         LEARNING POINT: Tank drive needs independent motor control
         Each motor runs at its own speed based on joystick position
-        """
-        self.current_speed = speed
-        self.is_running = True
         
-        # Calculate delay based on speed (faster = shorter delay)
-        # Base delay of 3ms at full speed
+        This only hands the speed to the worker thread and returns, so it is
+        cheap enough to call on every joystick update.
+        """
         if abs(speed) < 0.1:  # Deadzone
             self.stop()
             return
         
-        base_delay = 0.0001
-        delay = base_delay / abs(speed)
-        direction = 1 if speed > 0 else -1
+        # Called on every speed change, so don't even format the message
+        # unless debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            delay = self.BASE_DELAY / abs(speed)  # faster = shorter delay
+            logger.debug("%s running at speed %.2f (delay: %.4fs)", self.name, speed, delay)
         
-        logger.debug(f"{self.name} running at speed {speed:.2f} (delay: {delay:.4f}s)")
+        self.target_speed = speed
+        self.is_running = True
+        if run_steps:
+            self._state[:] = speed, 1.0
+        self.speed_changed.set()
+    
+    def _worker(self):
+        """Step at target_speed against perf_counter deadlines; park while stopped"""
+        while True:
+            self.speed_changed.wait()
+            self.speed_changed.clear()
+            
+            if run_steps:
+                self.current_step = run_steps(PI_HANDLE, self._mask_array, self.current_step,
+                                              self._state, self.BASE_DELAY)
+                self.release_coils()
+                continue
+            
+            next_step = time.perf_counter()
+            while self.is_running:
+                speed = self.target_speed  # re-read every step, so changes apply at once
+                if abs(speed) <= 0.1:
+                    break
+                direction = 1 if speed > 0 else -1
+                if self._burst_masks:
+                    # A cycle at a time in compiled code; speed is re-read between
+                    # cycles. _stops is read before is_running, so a stop() that
+                    # lands after the check still ends the burst at its next phase.
+                    stops = self._stops[0]
+                    if self.is_running:
+                        stepper_core.run(gpio_regs, self._burst_masks[direction], 1,
+                                         self.BASE_DELAY / abs(speed), self._stops, stops)
+                    continue
+                self.step(direction)
+                # Absolute deadlines keep the pace even; after a stall, carry on
+                # from now rather than bursting to catch up
+                next_step = max(next_step + self.BASE_DELAY / abs(speed), time.perf_counter())
+                sleep_until(next_step)
+            
+            self.release_coils()  # a step may have raced with stop()
+    
+    def wave_pulses(self, steps: int, duration_us: int) -> list:
+        """
+        pigpio pulses spreading `steps` steps evenly over duration_us
         
-        while self.is_running and abs(self.current_speed) > 0.1:
-            self.step(direction)
-            await asyncio.sleep(delay)
+        steps should be a whole number of cycles so the wave loops cleanly.
+        """
+        direction = 1 if self.target_speed > 0 else -1
+        pulses = []
+        for i in range(steps):
+            set_mask, clear_mask = self._ring[(i * direction) & self.RING_MASK]
+            # Integer delays that add up to exactly duration_us
+            delay = (i + 1) * duration_us // steps - i * duration_us // steps
+            pulses.append(pigpio.pulse(set_mask, clear_mask, delay))
+        return pulses
     
     def stop(self):
         """Stop motor and turn off all coils"""
         self.is_running = False
-        self.current_speed = 0.0
-        if GPIO:
-            for pin in self.pins:
-                GPIO.output(pin, GPIO.LOW)
+        self.target_speed = 0.0
+        if run_steps:
+            self._state[:] = 0.0
+        self._stops[0] = (self._stops[0] + 1) & 0xFFFFFFFF  # after is_running, see _worker
+        self.release_coils()
+    
+    def release_coils(self):
+        """Turn off all four coils"""
+        if pi:
+            pi.clear_bank_1(self._pin_mask)
+        elif GPIO:
+            GPIO.output(self.pins, GPIO.LOW)
 
 
 class RoverMotorController:
@@ -131,11 +376,14 @@ class RoverMotorController:
     - Different speeds on each side = curved turns
     """
     
+    SPEED_EPSILON = 0.01  # smaller speed changes are not passed on
+    WAVE_CYCLES = 4  # most step cycles of the slower motor in one wave
+    MAX_WAVE_TIME = 0.1  # a new speed waits for the playing wave to end
+    
     def __init__(self, left_pins: List[int], right_pins: List[int]):
         self.left_motor = StepperMotor(left_pins, "Left Motor")
         self.right_motor = StepperMotor(right_pins, "Right Motor")
-        self.left_task: Optional[asyncio.Task] = None
-        self.right_task: Optional[asyncio.Task] = None
+        self.old_waves: List[int] = []  # sent and not deleted yet, oldest first
     
     def set_tank_drive(self, left_speed: float, right_speed: float):
         """
@@ -146,17 +394,72 @@ class RoverMotorController:
             right_speed: -1.0 to 1.0 for right motor
         
         LEARNING POINT: This is called continuously as joysticks move
-        We cancel old tasks and start new ones at updated speeds
+        so it only updates the speed each motor's worker thread steps at
+        
+        Readings are rounded to 0.01 and ignored unless one side moves by at
+        least SPEED_EPSILON, so a noisy stick held still doesn't thrash.
+        Anything inside the deadzone counts as 0, the speed it stops at.
+        """
+        left_speed = -round(left_speed, 2)  # left motor is mounted mirrored
+        right_speed = round(right_speed, 2)
+        if abs(left_speed) < 0.1:  # same deadzone as StepperMotor.set_speed
+            left_speed = 0.0
+        if abs(right_speed) < 0.1:
+            right_speed = 0.0
+        if (abs(left_speed - self.left_motor.target_speed) < self.SPEED_EPSILON and
+                abs(right_speed - self.right_motor.target_speed) < self.SPEED_EPSILON):
+            return
+        if WAVE_DRIVE and ((self.left_motor.is_running and not left_speed) or
+                           (self.right_motor.is_running and not right_speed)):
+            # A motor is stopping: cut the playing wave now, or it would step
+            # on (and power the coils again) until the end of its loop
+            pi.wave_tx_stop()
+        self.left_motor.set_speed(left_speed)
+        self.right_motor.set_speed(right_speed)
+        if WAVE_DRIVE:
+            self.start_wave()
+    
+    def start_wave(self):
         """
-        # Cancel existing tasks
-        if self.left_task and not self.left_task.done():
-            self.left_task.cancel()
-        if self.right_task and not self.right_task.done():
-            self.right_task.cancel()
+        Loop both motors' current speeds on pigpio's DMA engine
+        
+        There is one wave transmitter, so both motors share a wave: it lasts
+        up to WAVE_CYCLES cycles of the slower motor (fewer when they'd take
+        longer than MAX_WAVE_TIME), and the faster one fits the nearest whole
+        number of cycles into the same time.
+        """
+        running = [motor for motor in (self.left_motor, self.right_motor) if motor.is_running]
+        if not running:
+            self.stop()
+            return
+        
+        cycle = len(StepperMotor.STEP_SEQUENCE)
+        slowest = min(abs(motor.target_speed) for motor in running)
+        cycle_time = cycle * StepperMotor.BASE_DELAY / slowest
+        cycles = max(1, min(self.WAVE_CYCLES, int(self.MAX_WAVE_TIME / cycle_time)))
+        duration_us = round(cycles * cycle_time * 1e6)
+        
+        pi.wave_add_new()
+        for motor in (self.left_motor, self.right_motor):
+            if motor.is_running:
+                delay_us = StepperMotor.BASE_DELAY / abs(motor.target_speed) * 1e6
+                steps = max(1, round(duration_us / delay_us / cycle)) * cycle
+                pi.wave_add_generic(motor.wave_pulses(steps, duration_us))
+            else:
+                pi.wave_add_generic([pigpio.pulse(0, motor._pin_mask, 0)])  # coils off
+        wave_id = pi.wave_create()
         
-        # Start new tasks at specified speeds
-        self.left_task = asyncio.create_task(self.left_motor.run_at_speed(-left_speed))
-        self.right_task = asyncio.create_task(self.right_motor.run_at_speed(right_speed))
+        # SYNC lets the playing wave finish its loop first, so there's no glitch
+        pi.wave_send_using_mode(wave_id, pigpio.WAVE_MODE_REPEAT_SYNC)
+        self.old_waves.append(wave_id)
+        # Waves play in the order they were sent, so only the ones before the
+        # current wave are done with; later ones may still be queued
+        playing = pi.wave_tx_at()
+        if playing in self.old_waves:
+            done = self.old_waves.index(playing)
+            for old_wave in self.old_waves[:done]:
+                pi.wave_delete(old_wave)
+            del self.old_waves[:done]
     
     async def move_forward(self, speed: float = 0.003):
         """Move rover forward - both motors same direction (for button control)"""
@@ -176,13 +479,13 @@ class RoverMotorController:
     
     def stop(self):
         """Stop all movement"""
+        if WAVE_DRIVE:
+            pi.wave_tx_stop()
+            for old_wave in self.old_waves:
+                pi.wave_delete(old_wave)
+            self.old_waves.clear()
         self.left_motor.stop()
         self.right_motor.stop()
-        
-        if self.left_task and not self.left_task.done():
-            self.left_task.cancel()
-        if self.right_task and not self.right_task.done():
-            self.right_task.cancel()
     
     def execute_command(self, command: str):
         """Execute a movement command (for button/keyboard control)"""
@@ -203,6 +506,15 @@ class RoverMotorController:
 class RoverHealthMonitor:
     """Monitors and reports rover health statistics"""
     
+    TEMP_PATH = '/sys/class/thermal/thermal_zone0/temp'
+    
+    def __init__(self):
+        # Kept open: sysfs re-reads the value on every read from offset 0
+        try:
+            self._temp_file = open(self.TEMP_PATH, 'rb', buffering=0)
+        except OSError:
+            self._temp_file = None
+    
     def get_health_data(self) -> Dict:
         """Return current health statistics"""
         return {
@@ -217,9 +529,9 @@ class RoverHealthMonitor:
     def _get_cpu_temp(self) -> float:
         """Read CPU temperature from Raspberry Pi"""
         try:
-            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                temp = float(f.read()) / 1000.0
-                return round(temp, 1)
+            self._temp_file.seek(0)
+            temp = int(self._temp_file.read()) / 1000.0
+            return round(temp, 1)
         except:
             return 0.0
 
@@ -234,12 +546,24 @@ class USBCameraStreamer:
     - Uses standard V4L2 (Video4Linux2) interface
     """
     
+    SCALED_WIDTHS = (160, 320, 480)  # offered to viewers below the 640 capture
+    
     def __init__(self, camera_index: int = 0):
         self.camera_index = camera_index
         self.camera = None
         self.is_streaming = False
-        self.frame_lock = threading.Lock()
-        self.current_frame = None
+        # (seq, jpeg, chunk, scaled_chunks) for the newest frame, replaced as
+        # a whole, so readers need no lock: chunk is the jpeg wrapped for the
+        # MJPEG stream, scaled_chunks the same by scaled width
+        self.latest = (0, None, None, {})
+        self.viewer_counts: Dict[int, int] = {}  # scaled width -> viewers (event loop only)
+        # The widths with viewers, for the capture thread: replaced as a whole
+        # rather than changed, so it can't change under the thread mid-read
+        self.viewer_widths: Tuple[int, ...] = ()
+        self.capture_thread = None
+        # Set from the event loop for every new frame; see attach_loop()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.frame_ready: Optional[asyncio.Event] = None
         self.setup_camera()
     
     def setup_camera(self):
@@ -252,18 +576,33 @@ class USBCameraStreamer:
         """
         if cv2:
             try:
-                self.camera = cv2.VideoCapture(self.camera_index)
+                self.camera = cv2.VideoCapture(self.camera_index, cv2.CAP_V4L2)
                 
                 # Set camera properties for better performance
+                # MJPG makes the camera compress frames itself
+                self.camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
                 self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
                 self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
                 self.camera.set(cv2.CAP_PROP_FPS, 30)
+                # Only if the camera really took MJPG: with CONVERT_RGB off
+                # read() then hands back that JPEG untouched. Other formats
+                # (YUYV...) are left to OpenCV to convert to BGR for encoding.
+                if int(self.camera.get(cv2.CAP_PROP_FOURCC)) == cv2.VideoWriter_fourcc(*'MJPG'):
+                    self.camera.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+                else:
+                    logger.info("Camera doesn't offer MJPG - encoding frames on the Pi")
+                # read() is what paces the stream, so keep the driver queue to
+                # one frame: each read blocks for the next capture, never stale
+                self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
                 
                 # Test if camera works
                 ret, frame = self.camera.read()
                 if ret:
                     logger.info(f"USB Camera initialized successfully (index: {self.camera_index})")
                     self.is_streaming = True
+                    self.capture_thread = threading.Thread(target=self.capture_loop,
+                                                           name="Camera", daemon=True)
+                    self.capture_thread.start()
                 else:
                     logger.error("Camera opened but couldn't read frame")
                     self.camera = None
@@ -272,29 +611,134 @@ class USBCameraStreamer:
                 logger.error(f"Camera initialization failed: {e}")
                 self.camera = None
     
-    def get_frame(self) -> Optional[bytes]:
+    def capture_loop(self):
         """
-        Capture and return a JPEG frame
+        Capture and JPEG-encode frames on this thread, keeping the newest
         
         LEARNING POINT: We encode frames as JPEG for efficient transmission
         Much smaller than raw image data
+        
+        read() and imencode() release the GIL, so capturing here keeps the
+        event loop (and motor control) free, and each frame is encoded once
+        however many viewers there are.
         """
-        if self.camera and self.is_streaming:
+        while self.is_streaming:
             try:
                 ret, frame = self.camera.read()
                 if ret:
-                    # Encode frame as JPEG
-                    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                    if ret:
-                        return buffer.tobytes()
+                    if frame.ndim == 1 or frame.shape[0] == 1:
+                        # Already a JPEG from the camera - forward it verbatim
+                        image = None
+                        jpeg = frame.tobytes()
+                    else:
+                        # Camera without MJPG support: encode frame as JPEG
+                        image = frame
+                        jpeg = self.encode_jpeg(frame)
+                    
+                    # Smaller copies only for widths someone is watching
+                    scaled_chunks = {}
+                    widths = self.viewer_widths
+                    if widths and image is None:
+                        image = cv2.imdecode(frame, cv2.IMREAD_COLOR)
+                    for width in widths:
+                        height = image.shape[0] * width // image.shape[1]
+                        small = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+                        scaled_chunks[width] = MJPEG_PREFIX + self.encode_jpeg(small) + MJPEG_SUFFIX
+                    
+                    self.publish_frame(jpeg, scaled_chunks)
                 else:
                     logger.warning("Failed to read frame from camera")
+                    time.sleep(0.1)
             except Exception as e:
                 logger.error(f"Frame capture error: {e}")
+                time.sleep(0.1)
+    
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        """Let the capture thread wake stream handlers running on `loop`"""
+        self.frame_ready = asyncio.Event()
+        self.loop = loop
+    
+    def encode_jpeg(self, image) -> bytes:
+        """JPEG-encode a BGR image at quality 80"""
+        if turbo_jpeg:
+            return turbo_jpeg.encode(image, quality=80, jpeg_subsample=TJSAMP_422)
+        ret, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        if not ret:
+            raise RuntimeError("cv2.imencode failed")
+        return buffer.tobytes()
+    
+    def stream_width(self, requested: Optional[str]) -> Optional[int]:
+        """
+        Map a viewer's ?w= to one of SCALED_WIDTHS, or None for full size
+        
+        Only a few fixed widths, so viewers can share the scaled copies.
+        """
+        try:
+            width = int(requested)
+        except (TypeError, ValueError):
+            return None
+        if width <= 0:
+            return None
+        for scaled_width in self.SCALED_WIDTHS:
+            if width <= scaled_width:
+                return scaled_width
         return None
     
+    def add_viewer(self, width: Optional[int]):
+        """Start making frames `width` wide (None = full size needs nothing)"""
+        if width:
+            self.viewer_counts[width] = self.viewer_counts.get(width, 0) + 1
+            self.viewer_widths = tuple(self.viewer_counts)
+    
+    def remove_viewer(self, width: Optional[int]):
+        """Undo add_viewer(); the width stops being made with its last viewer"""
+        if width:
+            self.viewer_counts[width] -= 1
+            if not self.viewer_counts[width]:
+                del self.viewer_counts[width]
+            self.viewer_widths = tuple(self.viewer_counts)
+    
+    def publish_frame(self, jpeg: bytes, scaled_chunks: Dict[int, bytes]):
+        """
+        Store a new frame and wake the stream handlers (capture thread)
+        
+        The multipart chunk is built here, once per frame, instead of by
+        every viewer's handler. scaled_chunks holds the same frame as
+        ready chunks for the widths in viewer_widths.
+        """
+        chunk = MJPEG_PREFIX + jpeg + MJPEG_SUFFIX
+        # One reference assignment is atomic, so this publishes all of it at once
+        self.latest = (self.latest[0] + 1, jpeg, chunk, scaled_chunks)
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._wake_viewers)
+    
+    def _wake_viewers(self):
+        # set() wakes every current waiter; clearing straight away makes
+        # them wait again for the next frame
+        self.frame_ready.set()
+        self.frame_ready.clear()
+    
+    def get_frame(self) -> Optional[bytes]:
+        """Return the latest JPEG frame, or None before the first one"""
+        return self.latest[1]
+    
+    def get_chunk(self, width: Optional[int] = None) -> Tuple[int, Optional[bytes]]:
+        """
+        Return (seq, chunk): the latest frame as a ready-to-send multipart chunk
+        
+        With a width, the scaled copy, or None until one has been made.
+        seq goes up by one per frame.
+        """
+        seq, _, chunk, scaled_chunks = self.latest
+        if width:
+            return seq, scaled_chunks.get(width)
+        return seq, chunk
+    
     def release(self):
         """Release camera resources"""
+        self.is_streaming = False
+        if self.capture_thread:
+            self.capture_thread.join(timeout=1.0)
         if self.camera:
             self.camera.release()
             logger.info("Camera released")
@@ -358,7 +802,11 @@ class RoverWebServer:
         LEARNING POINT: MJPEG (Motion JPEG) streams individual JPEG frames
         Browser displays them continuously like a video
         This is simpler than H.264 but uses more bandwidth
+        
+        ?w=320 asks for a downscaled stream (see stream_width), which is
+        cheaper to encode and send when the page shows it small.
         """
+        width = self.camera.stream_width(request.query.get('w'))
         response = web.StreamResponse(
             status=200,
             reason='OK',
@@ -371,21 +819,27 @@ class RoverWebServer:
         
         await response.prepare(request)
         
+        self.camera.add_viewer(width)
+        sent_seq = 0
+        transport = request.transport
         try:
-            while True:
-                frame = self.camera.get_frame()
-                if frame:
+            while transport is not None and not transport.is_closing():
+                # Paced by the camera: every viewer gets each frame once. The
+                # timeout is for when no frames come (no camera, or capture
+                # stopped), so a viewer that left is still noticed.
+                try:
+                    await asyncio.wait_for(self.camera.frame_ready.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue
+                seq, chunk = self.camera.get_chunk(width)
+                if chunk and seq != sent_seq:
                     # Send frame in MJPEG format
-                    await response.write(
-                        b'--frame\r\n'
-                        b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n'
-                    )
-                    await asyncio.sleep(0.033)  # ~30 FPS
-                else:
-                    await asyncio.sleep(0.1)
+                    await response.write(chunk)
+                    sent_seq = seq
         except Exception as e:
             logger.error(f"Camera stream error: {e}")
         finally:
+            self.camera.remove_viewer(width)
             await response.write_eof()
         
         return response
@@ -400,7 +854,9 @@ class RoverWebServer:
         
         try:
             async for msg in ws:
-                if msg.type == web.WSMsgType.TEXT:
+                if msg.type == web.WSMsgType.BINARY:
+                    self.handle_binary_message(msg.data)
+                elif msg.type == web.WSMsgType.TEXT:
                     await self.handle_websocket_message(ws, msg.data)
                 elif msg.type == web.WSMsgType.ERROR:
                     logger.error(f'WebSocket error: {ws.exception()}')
@@ -410,6 +866,23 @@ class RoverWebServer:
         
         return ws
     
+    def handle_binary_message(self, data: bytes):
+        """
+        Process a binary joystick frame (see TANK_DRIVE_FRAME)
+        
+        These come at joystick rate, so they skip JSON parsing entirely
+        """
+        if len(data) < TANK_DRIVE_FRAME.size:
+            logger.error(f"Short binary message ({len(data)} bytes)")
+            return
+        tag, left_speed, right_speed = TANK_DRIVE_FRAME.unpack_from(data)
+        if tag == TANK_DRIVE:
+            # Clamp values to -1.0 to 1.0
+            self.motor_controller.set_tank_drive(max(-1.0, min(1.0, left_speed)),
+                                                 max(-1.0, min(1.0, right_speed)))
+        else:
+            logger.error(f"Unknown binary message tag: {tag}")
+    
     async def handle_websocket_message(self, ws, message: str):
         """
         Process incoming WebSocket messages
@@ -469,15 +942,18 @@ class RoverWebServer:
             
             if self.websockets:
                 health_data = self.health_monitor.get_health_data()
-                message = json.dumps({
+                # Encoded once as bytes, not re-encoded per client by send_str
+                message = json_bytes({
                     'type': 'health',
                     'data': health_data
                 })
                 
-                for ws in self.websockets.copy():
-                    try:
-                        await ws.send_str(message)
-                    except:
+                # Send to everyone at once so one slow client can't hold up the rest
+                clients = list(self.websockets)
+                results = await asyncio.gather(*(ws.send_bytes(message) for ws in clients),
+                                               return_exceptions=True)
+                for ws, result in zip(clients, results):
+                    if isinstance(result, Exception):
                         self.websockets.discard(ws)
     
     async def startup_tasks(self, app):
@@ -487,6 +963,7 @@ class RoverWebServer:
         LEARNING POINT: This is called by aiohttp when the event loop is ready
         Now we can safely create async tasks
         """
+        self.camera.attach_loop(asyncio.get_running_loop())
         app['health_task'] = asyncio.create_task(self.broadcast_health())
         logger.info("Health monitoring started")
     
@@ -511,6 +988,10 @@ class RoverWebServer:
             self.app.on_startup.append(self.startup_tasks)
             self.app.on_cleanup.append(self.cleanup_tasks)
             
+            if uvloop:
+                uvloop.install()  # run_app creates its loop from this policy
+                logger.info("Using uvloop event loop")
+            
             logger.info(f"Starting Mars Rover server on http://{host}:{port}")
             logger.info("Tank Drive Enabled: Left stick = left motor, Right stick = right motor")
             web.run_app(self.app, host=host, port=port)
@@ -525,7 +1006,11 @@ class RoverWebServer:
         logger.info("Cleaning up resources...")
         self.motor_controller.stop()
         self.camera.release()
-        if GPIO:
+        if pi:
+            if run_steps:
+                pigpiod_if2.pigpio_stop(PI_HANDLE)
+            pi.stop()
+        elif GPIO:
             GPIO.cleanup()
 
 
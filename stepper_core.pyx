@@ -0,0 +1,76 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled stepper loop shared by the stepper scripts
+
+Writes each phase straight to the mmapped GPSET0/GPCLR0 registers and
+paces phases with absolute clock_nanosleep deadlines, all without the GIL,
+so motor threads really run in parallel. Built on first import by
+pyximport (see stepper_core.pyxbld).
+
+run() is used by gpio_stepper.py (which dual_motor_test.py,
+dual_motor_same.py and WebRover_3.py step through) and by rover_server.py.
+"""
+
+from libc.stdint cimport uint32_t
+
+cdef extern from *:
+    """
+    #include <time.h>
+    static inline void reg_write(volatile uint32_t *regs, int index, uint32_t value) {
+        regs[index] = value;
+    }
+    static inline uint32_t word_read(volatile uint32_t *word) {
+        return *word;
+    }
+    static inline long long now_ns(void) {
+        struct timespec ts;
+        clock_gettime(CLOCK_MONOTONIC, &ts);
+        return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+    }
+    static inline void sleep_until_ns(long long deadline) {
+        struct timespec ts;
+        ts.tv_sec = deadline / 1000000000LL;
+        ts.tv_nsec = deadline % 1000000000LL;
+        clock_nanosleep(CLOCK_MONOTONIC, TIMER_ABSTIME, &ts, NULL);
+    }
+    """
+    void reg_write(uint32_t *regs, int index, uint32_t value) nogil
+    uint32_t word_read(uint32_t *word) nogil
+    long long now_ns() nogil
+    void sleep_until_ns(long long deadline) nogil
+
+cdef enum:
+    GPSET0 = 7  # word offsets into the GPIO register block
+    GPCLR0 = 10
+
+cdef void run_steps(uint32_t *regs, const uint32_t *masks, int phases, int count,
+                    long long delay_ns, uint32_t *generation, uint32_t expected) noexcept nogil:
+    # masks holds `phases` (set, clear) pairs back to back
+    cdef int step, phase
+    cdef long long deadline = now_ns()
+    cdef long long now
+    for step in range(count):
+        for phase in range(phases):
+            if word_read(generation) != expected:
+                return
+            reg_write(regs, GPCLR0, masks[2 * phase + 1])
+            reg_write(regs, GPSET0, masks[2 * phase])
+            # Absolute deadlines so overshoot doesn't accumulate, but no
+            # burst of fast phases to catch up after a stall
+            deadline += delay_ns
+            now = now_ns()
+            if deadline < now:
+                deadline = now
+            sleep_until_ns(deadline)
+
+def run(uint32_t[::1] regs, const uint32_t[::1] masks, int count, double delay,
+        uint32_t[::1] generation, uint32_t expected):
+    """Play `count` cycles of `masks` on the GPIO registers, then return
+
+    regs is the /dev/gpiomem mapping cast to 32-bit words, masks a flat
+    array('I') of set_mask, clear_mask pairs, one pair per phase, and delay
+    the time per phase in seconds. The move ends early, before the next
+    phase, once another thread changes generation[0] away from `expected`.
+    """
+    with nogil:
+        run_steps(&regs[0], &masks[0], masks.shape[0] // 2, count,
+                  <long long>(delay * 1e9), &generation[0], expected)
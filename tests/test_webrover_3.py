@@ -0,0 +1,47 @@
+"""Controller handling in WebRover_3, off the Pi
+
+The hardware modules (RPi.GPIO, OpenCV) are replaced with mocks, and
+eventlet is hidden so the module serves with plain threads.
+"""
+
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('numpy')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def rover():
+    gpio = mock.MagicMock()
+    fakes = {'RPi': mock.MagicMock(GPIO=gpio), 'RPi.GPIO': gpio,
+             'cv2': mock.MagicMock(), 'eventlet': None}
+    with mock.patch.dict(sys.modules, fakes):
+        sys.modules.pop('WebRover_3', None)
+        sys.modules.pop('gpio_stepper', None)
+        import WebRover_3
+        WebRover_3.last_move.update(cmd=None, at=0.0, refresh=0.0, stick=False)
+        with mock.patch.object(WebRover_3, 'move_rover') as move_rover:
+            yield WebRover_3, move_rover
+        sys.modules.pop('WebRover_3', None)
+        sys.modules.pop('gpio_stepper', None)
+
+
+def test_dpad_press_queues_a_quarter_turn(rover):
+    WebRover_3, move_rover = rover
+    WebRover_3.handle_controller_data([0, 0, 0, 0, 0, 0, WebRover_3.DPAD_UP])
+    move_rover.assert_called_once_with(32, 32)
+
+
+def test_short_stick_move_is_stretched(rover):
+    WebRover_3, move_rover = rover
+    WebRover_3.controller_move(10, 10, stick=True)
+    (left, right), _ = move_rover.call_args
+    assert left == right
+    assert left * len(WebRover_3.step_sequence) * 0.001 >= WebRover_3.MIN_CONTROLLER_MOVE_TIME